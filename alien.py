@@ -1,6 +1,7 @@
-import pygame
 from pygame.sprite import Sprite
 
+from assets import assets
+
 class Alien(Sprite):
     """A class to represent a single alien in the fleet"""
 
@@ -11,25 +12,19 @@ class Alien(Sprite):
         self.settings = ss_game.settings
 
         # Load the alien image and set its rect attribute.
-        self.image = pygame.image.load("images/alien.png")
+        self.image = assets.image("alien")
         self.rect = self.image.get_rect()
+        # Shared by every alien, for pixel-accurate collisions.
+        self.mask = assets.mask("alien")
 
         # Start each new alien near the top left of the screen.
         self.rect.x = 3 * self.rect.width
         self.rect.y = self.rect.height
 
-        # Store the alien's exact vertical position by float.
-        # The defining of this variable is just for changing the speed by small
-        # quantity. Without this variable, the speed only could be adjusted by
-        # integer. Rect class only accept intergers.
-        self.y = float(self.rect.y)
+        # The alien's place in the fleet's arrays. The fleet keeps its exact
+        # position and moves it.
+        self.index = 0
 
-    def update(self):
-        """Move the alien to the top or bottom."""
-        self.y += self.settings.alien_speed * self.settings.fleet_direction
-        self.rect.y = self.y
-    
-    def check_edges(self):
-        """Return True if alien is at edge of screen."""
-        screen_rect = self.screen.get_rect()
-        return (self.rect.bottom >= screen_rect.bottom) or (self.rect.top <= 0)
\ No newline at end of file
+    def refresh_image(self):
+        """Take the image again, once it's been converted for a new display."""
+        self.image = assets.image("alien")
@@ -1,256 +1,310 @@
+import argparse
+import json
 import sys
-from time import sleep
-from pathlib import Path
+from time import perf_counter
+
+# Startup is timed from here, before pygame and the game are imported.
+STARTED = perf_counter()
 
 import pygame
-import pygame.mixer  # Add mixer for sound effects
 
+from assets import assets
+from audio import Audio
 from settings import Settings
-from plane import Plane
-from bullet import Bullet
-from alien import Alien
-from game_stats import Gamestats
+from game_sim import GameSim, Inputs
 from button import Button
 from scoreboard import Scoreboard
-from explosion import Explosion  # Import the Explosion class
+from renderer import (FullRenderer, DirtyRenderer, RenderQueue,
+                      BULLET_LAYER, PLANE_LAYER, ALIEN_LAYER, EXPLOSION_LAYER,
+                      HUD_LAYER, MENU_LAYER, OVERLAY_LAYER)
+from display import Display
+from profiler import FrameProfiler, ProfilerOverlay, EVENTS, DRAW, FLIP
+from memory import GCController, MemoryMonitor
+from replay import InputRecorder
+from highscores import HighScores
 
 class Horizongame:
     """Overall class to manage game assets and behaviors"""
-    
-    def __init__(self):
-        """Initialize"""
-        pygame.init()
-        pygame.mixer.init()  # Initialize the mixer for sound effects
+
+    def __init__(self, settings=None):
+        """Initialize the window and menu; the rest is left to load()."""
+        # Only what the menu needs. The audio device is opened by Audio
+        # on its own thread, so pygame.init() would only hold things up.
+        pygame.display.init()
+        pygame.font.init()
         self.clock = pygame.time.Clock()
-        self.settings = Settings()
-        self.stats = Gamestats(self)
+        self.settings = settings if settings else Settings()
 
-        self.screen = pygame.display.set_mode(
+        # Everything is laid out on a playfield of the settings' size; the
+        # display draws it at the render scale and fits it to the window.
+        self.display = Display(self.settings)
+        self.screen = pygame.Surface(
             (self.settings.screen_width, self.settings.screen_height))
 
         pygame.display.set_caption("Alien Blaster")
 
-        # Load sound effects
-        self.bullet_sound = pygame.mixer.Sound("sounds/bullet.wav")
-        self.alien_hit_sound = pygame.mixer.Sound("sounds/explode.wav")
-
-        # Load and play background music
-        pygame.mixer.music.load("sounds/War2.mp3")
-        pygame.mixer.music.set_volume(0.5)  # Set volume (0.0 to 1.0)
-        pygame.mixer.music.play(-1)  # Loop indefinitely
-
-        # Create the main essets
-        self.plane = Plane(self)
-        self.bullets = pygame.sprite.Group()
-        self.aliens = pygame.sprite.Group()
-        self.explosions = pygame.sprite.Group()  # Group to manage explosions
-        self._create_fleet()
+        # Sound effects and background music load in the background.
+        self.audio = Audio(self.settings.audio, assets.bundle(),
+                           self.settings.sound_channels,
+                           self.settings.sound_coalesce_ms)
+        self.audio.start()
+
         self._create_buttons()
+        self.inputs = Inputs()
+
+        if self.settings.dirty_rects:
+            self.renderer = DirtyRenderer(self.settings.bg_color, self.display)
+        else:
+            self.renderer = FullRenderer(self.settings.bg_color, self.display)
+        # Everything to draw is collected here, layer by layer, each frame.
+        self.render_queue = RenderQueue()
+
+        # The profiler is left out altogether unless it's asked for.
+        self.profiler = None
+        if self.settings.profile:
+            self.profiler = FrameProfiler(
+                memory=MemoryMonitor(self.settings.alloc_sample_every))
+            self.profiler_overlay = ProfilerOverlay(self.profiler)
+        # Garbage is collected on the menu and between levels, not in play.
+        self.gc_control = GCController(self.settings.gc_mode,
+                                       self.settings.gc_young_limit)
+
+        # The simulation owns the plane, bullets, fleet, score and level;
+        # this class only draws it and feeds it the player's input. It is
+        # created by load(), once the menu is on screen.
+        self.sim = None
+        self.recorder = None
+        # Whether a run has started that isn't in the score journal yet.
+        self.run_in_progress = False
+        # Seconds from startup to the first frame and to being playable.
+        self.startup_times = {}
+
+    def load(self):
+        """Show the menu, then load the game behind a progress bar."""
+        stages = (self._load_images, self._load_high_scores, self._create_sim,
+                  self._create_scoreboard)
+        self._draw_loading(0, len(stages))
+        self.startup_times["first_frame"] = perf_counter() - STARTED
+        for number, stage in enumerate(stages, 1):
+            stage()
+            # Keep the window responsive; input waits in the queue.
+            pygame.event.pump()
+            self._draw_loading(number, len(stages))
+        self.renderer.invalidate()
+        self.startup_times["ready"] = perf_counter() - STARTED
+        if self.profiler:
+            self.profiler.memory.count_objects()
+
+    def _draw_loading(self, done, total):
+        """Draw the menu with a progress bar under it."""
+        bar = pygame.Surface((400, 12))
+        bar.fill((30, 30, 30))
+        bar.fill(self.settings.bg_color, bar.get_rect().inflate(-2, -2))
+        filled = bar.get_rect().inflate(-4, -4)
+        filled.width = filled.width * done // total
+        bar.fill((150, 200, 0), filled)
+        bar_rect = bar.get_rect(midbottom=self.screen.get_rect().midbottom)
+        bar_rect.y -= 40
+
+        queue = self.render_queue
+        queue.clear()
+        queue.extend(MENU_LAYER, ((button.image, button.rect)
+                                  for button in self.buttons))
+        queue.add(MENU_LAYER, bar, bar_rect)
+        self.renderer.draw(self.display.frame, self.display.scale_queue(queue))
+        self.renderer.present()
+
+    def _load_images(self):
+        """Decode and convert every image, explosion frames included."""
+        for name in ("alien", "missile", "plane"):
+            assets.image(name)
+        # Explosions come in two sizes: hits and the plane going down.
+        assets.frames("explosion", 1)
+        assets.frames("explosion", 2)
+
+    def _load_high_scores(self):
+        """Read the score journal and start writing to it."""
+        self.high_scores = HighScores(self.settings.score_journal)
+
+    def _create_sim(self):
+        """Create the simulation and hook up the profiler and recorder."""
+        self.sim = GameSim(self.settings, self.screen)
+        self.stats = self.sim.stats
+        self.stats.high_score = self.high_scores.best()
+        self.sim.profiler = self.profiler
+        if self.settings.record_path:
+            self.recorder = InputRecorder(self.sim)
+
+    def _create_scoreboard(self):
+        """Create the scoreboard, which needs the simulation's stats."""
         self.sb = Scoreboard(self)
 
-        self.game_active = False
-    
+    @property
+    def game_active(self):
+        """Whether a game is being played rather than the menu shown."""
+        return self.sim.game_active
+
+    @property
+    def plane(self):
+        """The simulation's plane."""
+        return self.sim.plane
+
+    @property
+    def bullets(self):
+        """The simulation's bullets."""
+        return self.sim.bullets
+
+    @property
+    def aliens(self):
+        """The simulation's fleet of aliens."""
+        return self.sim.aliens
+
+    @property
+    def explosions(self):
+        """The simulation's explosions."""
+        return self.sim.explosions
+
     def run_game(self):
-        """Start the main loop for the game."""
+        """Start the main loop for the game.
+
+        The simulation advances in fixed ticks to keep up with the time
+        that has really passed, and a frame is drawn after each batch of
+        ticks. A frame no tick was due for is skipped; after a slow one,
+        up to max_catch_up ticks run before drawing again. A tick runs
+        once half of it is due, which keeps one tick per frame steady when
+        the frame rate matches the tick rate, despite the clock's
+        whole-millisecond steps.
+        """
+        if self.sim is None:
+            self.load()
+        tick_time = 1000 / self.settings.tick_rate
+        max_catch_up = self.settings.max_catch_up
+        # Milliseconds of real time the simulation is behind.
+        behind = 0.0
         while True:
+            behind += self.clock.tick(self.settings.frame_rate)
+            if behind < tick_time / 2:
+                continue
+
+            profiler = self.profiler
+            if profiler:
+                profiler.start_frame()
             self._events_check()
-            if self.game_active:
-                self.plane.update()
-                self._update_bullets()
-                self._update_aliens()
-            self._update_screen()
-            self.clock.tick(60) # this changes the speed of the game, 
-                                # not only the screen refresh rate. 
-    
+            if profiler:
+                profiler.mark(EVENTS)
+            ticks = 0
+            while behind >= tick_time / 2 and ticks < max_catch_up:
+                behind -= tick_time
+                ticks += 1
+            # Too far behind to catch up; let the game slow down instead.
+            behind = min(behind, tick_time)
+            self._play_frame(ticks)
+            if profiler:
+                profiler.end_frame(len(self.sim.fleet), len(self.bullets),
+                                   len(self.explosions))
+
+    def _play_frame(self, ticks):
+        """Run some ticks of the simulation, then draw the frame."""
+        for tick in range(ticks):
+            if self.recorder:
+                self.recorder.record(self.inputs)
+            self.sim.step(self.inputs)
+            self._handle_sim_events()
+        # Collecting on the first frame of an explosion would show, so it
+        # waits until the explosions are over.
+        if self.gc_control.update(not self.sim.idle):
+            # Idle, and the heap is fresh from a collection.
+            if self.profiler:
+                self.profiler.memory.count_objects()
+        self._update_screen()
+
     def _update_screen(self):
-        """Update images on the screen, and flip to the new screen"""
-        self.screen.fill(self.settings.bg_color)
-        self.bullets.draw(self.screen)
-        self.plane.blitme()
-        self.aliens.draw(self.screen)
-        self.explosions.draw(self.screen)  # Draw explosions
+        """Draw everything and update the display."""
+        queue = self.display.scale_queue(self._queue_items())
+        self.renderer.draw(self.display.frame, queue)
+        if self.profiler:
+            self.profiler.mark(DRAW)
+        self.renderer.present()
+        if self.profiler:
+            self.profiler.mark(FLIP)
+        pygame.mouse.set_visible(not self.game_active)
+
+    def _queue_items(self):
+        """Fill the render queue with everything on screen this frame."""
+        queue = self.render_queue
+        queue.clear()
+        queue.extend(BULLET_LAYER, ((bullet.image, bullet.rect)
+                                    for bullet in self.bullets))
+        queue.add(PLANE_LAYER, self.plane.image, self.plane.rect)
+        self.sim.fleet.sync_rects()
+        queue.extend(ALIEN_LAYER, ((alien.image, alien.rect)
+                                   for alien in self.aliens))
+        queue.extend(EXPLOSION_LAYER, ((explosion.image, explosion.rect)
+                                       for explosion in self.explosions))
+
+        # The score information.
+        queue.extend(HUD_LAYER, self.sb.hud_items())
+
+        # The buttons, if the game is inactive.
+        if not self.game_active:
+            queue.extend(MENU_LAYER, ((button.image, button.rect)
+                                      for button in self.buttons))
 
-        # Draw the score information.
-        self.sb.show_score()
+        if self.profiler and self.profiler_overlay.visible:
+            queue.add(OVERLAY_LAYER, *self.profiler_overlay.item())
+        return queue
 
-        # Draw the start buttion if the game is inactive.
-        if not self.game_active:
-            self.easy_button.draw_button()
-            self.normal_button.draw_button()
-            self.hard_button.draw_button()
-            self.hell_button.draw_button()
-            self.quit_button.draw_button()
-            self.wf_button.draw_button()
-            pygame.mouse.set_visible(True)
-        
-        if self.game_active:
-            pygame.mouse.set_visible(False)
-
-        pygame.display.flip()
-    
     def _events_check(self):
-        """Response to the keypresses"""
+        """Turn the keypresses into input for the next tick."""
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 self._save_exit()
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_UP:
-                    self.plane.moving_up = True
+                    self.inputs.moving_up = True
                 if event.key == pygame.K_DOWN:
-                    self.plane.moving_down = True
+                    self.inputs.moving_down = True
                 if event.key == pygame.K_q:
                     self._save_exit()
                 if event.key == pygame.K_SPACE:
-                    self._fire_bullet()
+                    # A recording holds up to three shots per tick.
+                    self.inputs.fire = min(self.inputs.fire + 1, 3)
                 if event.key == pygame.K_ESCAPE:
-                    self.game_active = not self.game_active
+                    self.inputs.pause = not self.inputs.pause
+                if event.key == pygame.K_F3 and self.profiler:
+                    self.profiler_overlay.toggle()
             if event.type == pygame.KEYUP:
                 if event.key == pygame.K_UP:
-                    self.plane.moving_up = False
+                    self.inputs.moving_up = False
                 if event.key == pygame.K_DOWN:
-                    self.plane.moving_down = False
+                    self.inputs.moving_down = False
             if event.type == pygame.MOUSEBUTTONDOWN:
-                mouse_pos = pygame.mouse.get_pos()
+                mouse_pos = self.display.to_logical(pygame.mouse.get_pos())
                 self._check_buttons(mouse_pos)
 
-    def _fire_bullet(self):
-        """Create a new bullet and add it to the bullets group."""
-        if len(self.bullets) < self.settings.bullet_allowed:
-            new_bullet = Bullet(self)
-            self.bullets.add(new_bullet)
-            self.bullet_sound.play()  # Play bullet firing sound
-
-    def _update_bullets(self):
-        """Update position of the bullets and get rid of old bullets."""
-        # Update bullet's positions.
-        self.bullets.update()
-        # Get rid of the bullets that have disappeared.
-        for bullet in self.bullets.copy():
-            if bullet.rect.left >= self.settings.screen_width:
-                self.bullets.remove(bullet)
-        self._check_bullet_alien_collisions()
-        self.explosions.update()  # Update explosions
-
-    def _check_bullet_alien_collisions(self):
-        """Respond to bullet-alien collisions."""
-        # Check for any bullets that have hit the aliens.
-        # If so, get rid of the bullet and the alien.
-        collisions = pygame.sprite.groupcollide(self.bullets, self.aliens, 
-                                                True, True)
-        if collisions:
-            for bullet, aliens in collisions.items():
-                for alien in aliens:
-                    # Calculate the exact collision point
-                    collision_point = (bullet.rect.centerx, alien.rect.centery)
-                    explosion = Explosion(collision_point, self)
-                    self.explosions.add(explosion)
-                self.stats.score += self.settings.alien_points * len(aliens)
-            self.sb.prep_score()
-            self.sb.check_high_score()
-            self.alien_hit_sound.play()  # Play alien hit sound
-
-        if not self.aliens:
-            while self.explosions:
-                self._update_screen()
-                self.explosions.update()
-                self.alien_hit_sound.play()
-                self.clock.tick(60)
-            sleep(2.5)
-            self._start_new_level()
-    
-    def _start_new_level(self):
-        """reset the screen and start a new level after destroyed all aliens."""
-        # Destroy existing bullets and create new fleet.
-        self.bullets.empty()
-        self._create_fleet()
-        self.settings.increase_speed()
-
-        # Increase level.
-        self.stats.level += 1
-        self.sb.prep_level()
-
-    def _update_aliens(self):
-        """Check if the fleet is at an edge, then update the positions of all 
-        aliens in the fleet"""
-        self._check_fleet_edges()
-        self.aliens.update()
-        collision = pygame.sprite.spritecollideany(self.plane, self.aliens)
-        if collision:
-            self._plane_hit()
-        
-        self._check_aliens_leftedge()
-
-    def _create_fleet(self):
-        """Create the fleet of aliens."""
-        # Create an alien and keep adding aliens until there's no room left.
-        # Spacing between aliens is one alien width and one alien height.
-        alien = Alien(self)
-        alien_width, alien_height = alien.rect.size
-
-        current_x, current_y = alien_width * 5, alien_height
-        while current_y < (self.settings.screen_height - 2 * alien_height):
-            while current_x < self.settings.screen_width - alien_width * 2:
-                self._create_alien(current_x, current_y)
-                current_x += 2 * alien_width
-            
-            # Finish a row; reset x value, and increment y value.
-            current_x = alien_width * 5
-            current_y += 2 * alien_height
-
-    def _create_alien(self, x_position, y_position):
-        """Create an alien and put it in the row."""
-        new_alien = Alien(self)
-        new_alien.y = y_position
-        new_alien.rect.x = x_position
-        new_alien.rect.y = y_position
-        self.aliens.add(new_alien)
-
-    def _check_fleet_edges(self):
-        """Response appropriately if any aliens have reached an edge."""
-        for alien in self.aliens.sprites():
-            if alien.check_edges():
-                self._change_fleet_direction()
-                break
-    
-    def _change_fleet_direction(self):
-        """Forward the entire fleet and change the fleet's direction."""
-        for alien in self.aliens.sprites():
-            alien.rect.x -= self.settings.fleet_forward_speed
-        self.settings.fleet_direction *= -1
-
-    def _plane_hit(self):
-        """Respond to the ship being hit by an alien."""
-        # Create an explosion at the center of the plane
-        explosion = Explosion(self.plane.rect.center, self, scale=2)
-        self.explosions.add(explosion)
-        # Wait for the explosion animation to finish
-        while self.explosions:
-            self._update_screen()
-            self.explosions.update()
-            self.alien_hit_sound.play()
-            self.clock.tick(60)  # Maintain the frame rate
-        sleep(2.5)
-
-        if self.stats.plane_left > 0:
-            # Decrement plane_left, and update scoreboard.
-            self.stats.plane_left -= 1
-            self.sb.prep_planes()
-            # Get rid of any remaining bullets and aliens.
-            self.aliens.empty()
-            self.bullets.empty()
-            # Create a new fleet and center the plane.
-            self._create_fleet()
-            self.plane.center_plane()
-        else:
-            self.game_active = False
-            # pygame.mouse.set_visible(True)
-
-    def _check_aliens_leftedge(self):
-        for alien in self.aliens.sprites():
-            if alien.rect.x <= 0:
-                self._plane_hit()
-                break
-    
+    def _handle_sim_events(self):
+        """Play sounds and update the scoreboard for what just happened."""
+        for event in self.sim.events:
+            if event == "fire":
+                self.audio.play("bullet")  # Play bullet firing sound
+            elif event == "hit":
+                self.sb.prep_score()
+                self.audio.play("explode")  # Play alien hit sound
+            elif event == "high_score":
+                self.sb.prep_high_score()
+            elif event == "level":
+                self.sb.prep_level()
+            elif event == "plane_hit":
+                self.audio.play("explode")
+            elif event == "lives":
+                self.sb.prep_planes()
+            elif event == "start":
+                self.sb._prep_images()
+                self.run_in_progress = True
+            elif event == "game_over":
+                self._record_run()
+        self.sim.events.clear()
+
     def _create_buttons(self):
         """Create all buttons."""
         # Define button labels
@@ -273,64 +327,71 @@ class Horizongame:
     def _check_buttons(self, mouse_pos):
         """Start a new game when the player clicks one of the buttons."""
         if self.easy_button.rect.collidepoint(mouse_pos):
-            self._start_game()
+            self.inputs.start = "EASY"
         elif self.normal_button.rect.collidepoint(mouse_pos):
-            self._start_game()
-            for each in range(8):
-                self.settings.increase_speed()
+            self.inputs.start = "NORMAL"
         elif self.hard_button.rect.collidepoint(mouse_pos):
-            self._start_game()
-            for each in range(18):
-                self.settings.increase_speed()
+            self.inputs.start = "HARD"
         elif self.hell_button.rect.collidepoint(mouse_pos):
-            self._start_game()
-            for each in range(24):
-                self.settings.increase_speed()
+            self.inputs.start = "HELL"
         elif self.wf_button.rect.collidepoint(mouse_pos):
             self._switch_window_fullscreen()
         elif self.quit_button.rect.collidepoint(mouse_pos):
             self._save_exit()
 
-    def _start_game(self):
-        """Start a new game."""
-        # Reset the game settings:
-        self.settings.initialize_dynamic_settings()
-
-        # Reset the game statistics.
-        self.stats.reset_stats()
-        self.game_active = True
-        self.sb._prep_images()
-
-        # Get rid of any remaining bullets and aliens.
-        self.bullets.empty()
-        self.aliens.empty()
-
-        # Create a new fleet and center the ship.
-        self._create_fleet()
-        self.plane.center_plane()
-
-        # Hide the mouse cursor.
-        # pygame.mouse.set_visible(False)
-
     def _switch_window_fullscreen(self):
         """Switch between fullscreen and windowed mode."""
+        # Only the window changes; the playfield stays the same size.
         self.settings.fullscreen = not self.settings.fullscreen
-        if self.settings.fullscreen:
-            self.screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
-            self.settings.screen_width = self.screen.get_rect().width
-            self.settings.screen_height = self.screen.get_rect().height
-        else:
-            self.screen = pygame.display.set_mode(
-                (self.settings.screen_width, self.settings.screen_height))
+        self.display.set_mode(self.settings.fullscreen)
+        # Images must be converted again to the new display format.
+        assets.reconvert()
+        self.sim.refresh_images()
+        self.sb.refresh_images()
+        self.renderer.invalidate()
+
+    def _record_run(self):
+        """Add the run just played to the score journal."""
+        self.run_in_progress = False
+        self.high_scores.record(self.stats.score, self.stats.level,
+                                self.sim.difficulty)
 
     def _save_exit(self):
-        """Save the high score to highscore.txt and exit."""
-        path = Path("highscore.txt")
-        if int(path.read_text()) < self.stats.high_score:
-            path.write_text(str(self.stats.high_score))
+        """Record an unfinished run, write out the journal and exit."""
+        if self.profiler:
+            self.profiler.dump(self.settings.profile_output)
+        if self.recorder:
+            self.recorder.save(self.settings.record_path, self.sim)
+        if self.run_in_progress:
+            self._record_run()
+        self.high_scores.close()
+        self.gc_control.close()
         sys.exit()
 
 
-if __name__ == '__main__':
-    hg = Horizongame()
+def main(argv=None):
+    """Parse the command line and play."""
+    parser = argparse.ArgumentParser(description="A side shooting game.")
+    parser.add_argument("--no-audio", action="store_true",
+                        help="don't open the audio device at all")
+    parser.add_argument("--startup-time", action="store_true",
+                        help="print how long startup took as JSON and quit")
+    args = parser.parse_args(argv)
+
+    settings = Settings()
+    settings.audio = not args.no_audio
+    hg = Horizongame(settings)
+    if args.startup_time:
+        hg.load()
+        hg.audio.ready.wait(10)
+        times = {f"{stage}_ms": round(seconds * 1000, 1)
+                 for stage, seconds in hg.startup_times.items()}
+        if hg.audio.load_time is not None:
+            times["audio_ms"] = round(hg.audio.load_time * 1000, 1)
+        print(json.dumps(times))
+        return
     hg.run_game()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+import pygame
+
+from bundle import BUNDLE_PATH, open_bundle
+
+# Image files used by the game, looked up by a short name.
+IMAGE_FILES = {
+    "alien": "images/alien.png",
+    "missile": "images/missile.png",
+    "plane": "images/plane.png",
+    "explosion": "images/explosion.png",
+}
+
+# The explosion sprite sheet is a 4x4 grid of animation frames.
+SHEET_GRID = {"explosion": (4, 4)}
+
+
+class Assets:
+    """A process-wide registry that loads each image only once.
+
+    Images come from the packed bundle when there's an up-to-date one
+    (see bundle.py), and are decoded from the loose files otherwise.
+    """
+
+    def __init__(self, bundle_path=BUNDLE_PATH):
+        """Initialize empty caches; bundle_path None means loose files."""
+        # Decoded images, exactly as they came from the disk.
+        self._raw = {}
+        # Display-format surfaces and derived variants keyed by (name, scale).
+        self._images = {}
+        # Sprite sheet frame lists keyed by (name, scale).
+        self._frames = {}
+        # Collision masks keyed by (name, scale); a new display format
+        # doesn't change which pixels are solid, so these are kept.
+        self._masks = {}
+        # The bundle is opened on first use; False means not tried yet.
+        self.bundle_path = bundle_path
+        self._bundle = False if bundle_path else None
+        # The masks of display-ready surfaces, found once per display.
+        self._display_masks = None
+
+    def bundle(self):
+        """Return the packed bundle, or None to use the loose files."""
+        if self._bundle is False:
+            self._bundle = open_bundle(self.bundle_path)
+        return self._bundle
+
+    def image(self, name, scale=1):
+        """Return the named image converted to the display format."""
+        key = (name, scale)
+        surface = self._images.get(key)
+        if surface is None:
+            bundle = self.bundle()
+            surface = bundle.image(name, scale) if bundle else None
+            if surface is not None:
+                surface = self._convert(surface)
+            elif scale == 1:
+                surface = self._convert(self._load(name))
+            else:
+                base = self.image(name)
+                surface = pygame.transform.scale(base, (
+                    int(base.get_width() * scale),
+                    int(base.get_height() * scale)))
+            self._images[key] = surface
+        return surface
+
+    def mask(self, name, scale=1):
+        """Return the collision mask of the named image, built once."""
+        key = (name, scale)
+        mask = self._masks.get(key)
+        if mask is None:
+            mask = pygame.mask.from_surface(self.image(name, scale))
+            self._masks[key] = mask
+        return mask
+
+    def frames(self, name, scale=1):
+        """Return the frames of a sprite sheet, sliced and scaled once."""
+        key = (name, scale)
+        frames = self._frames.get(key)
+        if frames is None:
+            bundle = self.bundle()
+            frames = bundle.frames(name, scale) if bundle else None
+            if frames:
+                frames = [self._convert(frame) for frame in frames]
+            else:
+                frames = self._slice_sheet(name, scale)
+            self._frames[key] = frames
+        return frames
+
+    def reconvert(self):
+        """Drop converted surfaces so they are rebuilt for a new display."""
+        self._images.clear()
+        self._frames.clear()
+        self._display_masks = None
+
+    def _slice_sheet(self, name, scale):
+        """Cut a sprite sheet into frames, row by row."""
+        sheet = self.image(name)
+        columns, rows = SHEET_GRID[name]
+        frame_width = sheet.get_width() // columns
+        frame_height = sheet.get_height() // rows
+
+        frames = []
+        for row in range(rows):
+            for col in range(columns):
+                frame = sheet.subsurface(pygame.Rect(
+                    col * frame_width, row * frame_height,
+                    frame_width, frame_height))
+                if scale != 1:
+                    frame = pygame.transform.scale(frame, (
+                        int(frame_width * scale), int(frame_height * scale)))
+                frames.append(frame)
+        return frames
+
+    def _load(self, name):
+        """Read an image from the disk the first time it's asked for."""
+        surface = self._raw.get(name)
+        if surface is None:
+            surface = pygame.image.load(IMAGE_FILES[name])
+            self._raw[name] = surface
+        return surface
+
+    def _convert(self, surface):
+        """Convert to the display's pixel format when there is a display."""
+        if pygame.display.get_surface() is None:
+            return surface
+        if self._display_masks is None:
+            self._display_masks = pygame.Surface(
+                (1, 1), pygame.SRCALPHA).convert_alpha().get_masks()
+        if surface.get_masks() == self._display_masks:
+            # Already display-ready, like everything in the bundle.
+            return surface
+        return surface.convert_alpha()
+
+
+assets = Assets()
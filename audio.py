@@ -0,0 +1,128 @@
+import threading
+from time import perf_counter
+
+import pygame
+import pygame.mixer
+
+# Sound effects, looked up by a short name.
+SOUND_FILES = {
+    "bullet": "sounds/bullet.wav",
+    "explode": "sounds/explode.wav",
+}
+MUSIC_FILE = "sounds/War2.mp3"
+# Which category of mixer channels each effect plays on.
+SOUND_CATEGORIES = {
+    "bullet": "weapons",
+    "explode": "explosions",
+}
+
+
+class Audio:
+    """The game's sound, started on a background thread.
+
+    Opening the audio device and decoding the sound effects can take a
+    while, so the game doesn't wait for them: play() does nothing until
+    the sounds are ready, or at all if audio is turned off or there is no
+    device. The music is streamed from the file by the mixer.
+
+    Each category of effect gets its own reserved mixer channels, so
+    however busy a fight gets, no more voices than that are mixed. An
+    effect triggered again within coalesce_ms of its last play is heard
+    once, and one with no free channel left is dropped. `counts` keeps
+    track of how often each happened, and of the effects triggered while
+    there was no sound to play at all, as "unavailable".
+    """
+
+    def __init__(self, enabled=True, bundle=None, channels=None,
+                 coalesce_ms=40):
+        """Initialize without touching the audio device yet.
+
+        The sound files are read from the asset bundle, if one is given.
+        channels maps each category to its number of mixer channels.
+        """
+        self.enabled = enabled
+        self.bundle = bundle
+        self.channel_counts = channels or {"weapons": 2, "explosions": 4}
+        self.coalesce_ms = coalesce_ms
+        self.sounds = {}
+        # The reserved channels of each category, once the mixer is open.
+        self.channels = {}
+        # When each effect last started, in milliseconds.
+        self.last_played = dict.fromkeys(SOUND_FILES, None)
+        self.counts = {"triggered": 0, "played": 0, "coalesced": 0,
+                       "dropped": 0, "unavailable": 0}
+        # Set once loading has finished, whether or not it worked.
+        self.ready = threading.Event()
+        self.load_time = None
+
+    def start(self):
+        """Begin loading the sounds in the background."""
+        if not self.enabled:
+            self.ready.set()
+            return
+        threading.Thread(target=self._load, name="audio", daemon=True).start()
+
+    def play(self, name):
+        """Play a sound effect, if the sounds are ready and it's due."""
+        counts = self.counts
+        counts["triggered"] += 1
+        sound = self.sounds.get(name)
+        if not sound:
+            # Off, not loaded yet, or failed to load; no channel was wanted.
+            counts["unavailable"] += 1
+            return
+
+        now = perf_counter() * 1000
+        last = self.last_played[name]
+        if last is not None and now - last < self.coalesce_ms:
+            counts["coalesced"] += 1
+            return
+        for channel in self.channels[SOUND_CATEGORIES[name]]:
+            if not channel.get_busy():
+                channel.play(sound)
+                self.last_played[name] = now
+                counts["played"] += 1
+                return
+        counts["dropped"] += 1
+
+    def _open(self, path):
+        """Return the file from the bundle if it's there, else its path."""
+        packed = self.bundle.file(path) if self.bundle else None
+        return packed if packed else path
+
+    def _reserve_channels(self):
+        """Set aside the mixer channels of each category."""
+        total = sum(self.channel_counts.values())
+        pygame.mixer.set_num_channels(total)
+        # Nothing else may take them over.
+        pygame.mixer.set_reserved(total)
+        channels = {}
+        first = 0
+        for category, count in self.channel_counts.items():
+            channels[category] = [pygame.mixer.Channel(number)
+                                  for number in range(first, first + count)]
+            first += count
+        return channels
+
+    def _load(self):
+        """Open the device, load the effects and start the music."""
+        start = perf_counter()
+        try:
+            pygame.mixer.init()
+            channels = self._reserve_channels()
+            sounds = {name: pygame.mixer.Sound(self._open(path))
+                      for name, path in SOUND_FILES.items()}
+            pygame.mixer.music.load(self._open(MUSIC_FILE),
+                                    MUSIC_FILE.rsplit(".", 1)[-1])
+            pygame.mixer.music.set_volume(0.5)  # Set volume (0.0 to 1.0)
+            pygame.mixer.music.play(-1)  # Loop indefinitely
+        except pygame.error:
+            # No audio device; play on in silence.
+            self.enabled = False
+        else:
+            # Published all at once, so play() never sees half of them.
+            self.channels = channels
+            self.sounds = sounds
+        finally:
+            self.load_time = perf_counter() - start
+            self.ready.set()
@@ -0,0 +1,101 @@
+"""Policies that play the game by filling in each tick's Inputs."""
+import numpy as np
+
+
+class RandomPolicy:
+    """Wander up and down and fire at random."""
+
+    def __init__(self, rng, fire_chance=0.1, turn_chance=0.03):
+        """Initialize with a random.Random to draw from."""
+        self.rng = rng
+        self.fire_chance = fire_chance
+        self.turn_chance = turn_chance
+        self.direction = 0
+
+    def act(self, sim, inputs):
+        """Choose the input for the next tick."""
+        if self.rng.random() < self.turn_chance:
+            self.direction = self.rng.choice((-1, 0, 1))
+        inputs.moving_up = self.direction < 0
+        inputs.moving_down = self.direction > 0
+        inputs.fire = 1 if self.rng.random() < self.fire_chance else 0
+
+
+class ScriptedPolicy:
+    """Line up with the alien closest to the left edge and fire at it.
+
+    Given an rng, it plays like a person would: it takes a few ticks to
+    react to each new target and aims a little off its middle, so every
+    seed plays a different game. Without one it plays the same game every
+    time.
+    """
+
+    def __init__(self, rng=None, max_delay=8, max_aim_error=0.4):
+        """Initialize; the aim error is in alien heights."""
+        self.rng = rng
+        self.max_delay = max_delay
+        self.max_aim_error = max_aim_error
+        self.target = None
+        # Ticks still to wait before going after the target, and how far
+        # off its middle to aim, in pixels.
+        self.delay = 0
+        self.aim = 0.0
+
+    def act(self, sim, inputs):
+        """Choose the input for the next tick."""
+        fleet = sim.fleet
+        inputs.moving_up = inputs.moving_down = False
+        inputs.fire = 0
+        if not fleet.alive_count:
+            return
+
+        indices = np.flatnonzero(fleet.alive)
+        target = indices[fleet.x[indices].argmin()]
+        if self.rng and target != self.target:
+            self.target = target
+            self.delay = self.rng.randint(0, self.max_delay)
+            self.aim = self.rng.uniform(-self.max_aim_error,
+                                        self.max_aim_error) * fleet.height
+        if self.delay:
+            self.delay -= 1
+            return
+        target_y = fleet.y[target] + fleet.height / 2 + self.aim
+        offset = target_y - sim.plane.rect.centery
+        if offset < -4:
+            inputs.moving_up = True
+        elif offset > 4:
+            inputs.moving_down = True
+        if abs(offset) < fleet.height / 2:
+            inputs.fire = 1
+
+
+class SoakPolicy:
+    """Clear a few levels, then lose the game, and start another.
+
+    Plays like ScriptedPolicy until it reaches levels_per_game, then stops
+    firing until the aliens get through. Each new game is started from the
+    menu at the next of the difficulties. Made for soak tests, which need
+    a steady stream of new games, levels and lost planes.
+    """
+
+    def __init__(self, rng=None, levels_per_game=3,
+                 difficulties=("EASY", "NORMAL", "HARD", "HELL")):
+        """Initialize; an rng varies the play as it does ScriptedPolicy's."""
+        self.scripted = ScriptedPolicy(rng)
+        self.levels_per_game = levels_per_game
+        self.difficulties = difficulties
+        self.games = 0
+
+    def act(self, sim, inputs):
+        """Choose the input for the next tick."""
+        if not sim.game_active:
+            inputs.start = self.difficulties[self.games %
+                                             len(self.difficulties)]
+            self.games += 1
+            return
+        self.scripted.act(sim, inputs)
+        if sim.stats.level >= self.levels_per_game:
+            inputs.fire = 0
+
+
+POLICIES = {"random": RandomPolicy, "scripted": ScriptedPolicy}
@@ -0,0 +1,205 @@
+"""Play thousands of headless games across all cores to balance difficulty.
+
+Every combination of difficulty and settings variant is played by a
+policy from autopilot.py. Each worker process plays a chunk of games and
+sends back only their totals, never game objects:
+
+    python batch.py --games 2000
+    python batch.py --difficulty NORMAL HARD --vary speedup_scale=1.05,1.1
+    python batch.py --policy random --workers 4 -o balance.json
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from time import perf_counter
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from settings import Settings
+from game_sim import GameSim, Inputs
+from autopilot import POLICIES
+
+
+def new_totals():
+    """Return empty totals for a set of games.
+
+    Ticks, levels and scores only count the games that ended; the games
+    cut off at max_ticks have totals of their own.
+    """
+    return {"games": 0, "ticks": 0, "min_ticks": None, "max_ticks": 0,
+            "levels": 0, "max_level": 0, "score": 0, "max_score": 0,
+            "timeouts": 0, "timeout_levels": 0, "timeout_score": 0,
+            "shots": 0, "hits": 0}
+
+
+def add_totals(totals, other):
+    """Fold one set of totals into another."""
+    for key in ("games", "ticks", "levels", "score", "timeouts",
+                "timeout_levels", "timeout_score", "shots", "hits"):
+        totals[key] += other[key]
+    for key in ("max_ticks", "max_level", "max_score"):
+        totals[key] = max(totals[key], other[key])
+    if other["min_ticks"] is not None:
+        totals["min_ticks"] = (other["min_ticks"]
+                               if totals["min_ticks"] is None
+                               else min(totals["min_ticks"],
+                                        other["min_ticks"]))
+
+
+def variant_settings(overrides):
+    """Return Settings with a variant's values put in."""
+    settings = Settings()
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+    return settings
+
+
+def play_games(overrides, difficulty, policy_name, seeds, max_ticks):
+    """Play one game per seed and return their totals."""
+    totals = new_totals()
+    for seed in seeds:
+        sim = GameSim(variant_settings(overrides), seed=seed)
+        policy = POLICIES[policy_name](sim.rng)
+        inputs = Inputs(start=difficulty)
+        sim.step(inputs)
+
+        while sim.game_active and sim.ticks < max_ticks:
+            policy.act(sim, inputs)
+            sim.step(inputs)
+            sim.events.clear()
+
+        stats = sim.stats
+        game = new_totals()
+        game["shots"], game["hits"] = stats.shots_fired, stats.aliens_hit
+        if sim.game_active:
+            # Still alive at max_ticks; how long it would have lasted
+            # isn't known, so it stays out of the survival figures.
+            game["timeouts"] = 1
+            game["timeout_levels"] = stats.level
+            game["timeout_score"] = stats.score
+        else:
+            ticks = sim.ticks
+            game.update(games=1, ticks=ticks, min_ticks=ticks,
+                        max_ticks=ticks, levels=stats.level,
+                        max_level=stats.level, score=stats.score,
+                        max_score=stats.score)
+        add_totals(totals, game)
+    return totals
+
+
+def summarize(totals, tick_rate):
+    """Turn totals into averages and rates."""
+    games = totals["games"] or 1
+    timeouts = totals["timeouts"] or 1
+    return {
+        "games": totals["games"],
+        "timeouts": {
+            "games": totals["timeouts"],
+            "level_mean": round(totals["timeout_levels"] / timeouts, 2),
+            "score_mean": round(totals["timeout_score"] / timeouts, 1)},
+        "survival_seconds": {
+            "mean": round(totals["ticks"] / games / tick_rate, 2),
+            "min": round((totals["min_ticks"] or 0) / tick_rate, 2),
+            "max": round(totals["max_ticks"] / tick_rate, 2)},
+        "level": {"mean": round(totals["levels"] / games, 2),
+                  "max": totals["max_level"]},
+        "score": {"mean": round(totals["score"] / games, 1),
+                  "max": totals["max_score"]},
+        "hit_rate": (round(totals["hits"] / totals["shots"], 4)
+                     if totals["shots"] else None),
+    }
+
+
+def parse_value(text):
+    """Read a --vary value as JSON, or as a plain string if it isn't."""
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def parse_vary(options):
+    """Turn ["name=v1,v2", ...] into a list of override dicts."""
+    axes = []
+    for option in options:
+        name, values = option.split("=", 1)
+        if not hasattr(Settings(), name):
+            raise SystemExit(f"Settings has no attribute {name!r}")
+        axes.append([(name, parse_value(value))
+                     for value in values.split(",")])
+    return [dict(combination) for combination in itertools.product(*axes)]
+
+
+def main(argv=None):
+    """Run the batch and print or save the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=1000,
+                        help="games per variant")
+    parser.add_argument("--difficulty", nargs="+",
+                        default=list(Settings().difficulty_speedups))
+    parser.add_argument("--vary", action="append", default=[],
+                        metavar="NAME=V1,V2",
+                        help="settings values to try; may be repeated")
+    parser.add_argument("--policy", choices=POLICIES, default="scripted")
+    parser.add_argument("--max-ticks", type=int, default=60 * 60 * 10,
+                        help="give up on a game after this many ticks")
+    parser.add_argument("--chunk", type=int, default=25,
+                        help="games per task sent to a worker")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="write the JSON here")
+    args = parser.parse_args(argv)
+
+    variants = [(difficulty, overrides)
+                for difficulty in args.difficulty
+                for overrides in parse_vary(args.vary)]
+    totals = [new_totals() for variant in variants]
+
+    start = perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = {}
+        for number, (difficulty, overrides) in enumerate(variants):
+            for first in range(0, args.games, args.chunk):
+                seeds = range(args.seed + first,
+                              args.seed + min(first + args.chunk, args.games))
+                future = executor.submit(play_games, overrides, difficulty,
+                                         args.policy, list(seeds),
+                                         args.max_ticks)
+                futures[future] = number
+
+        done = 0
+        for future in as_completed(futures):
+            add_totals(totals[futures[future]], future.result())
+            done += 1
+            print(f"\r{done}/{len(futures)} chunks", end="", file=sys.stderr)
+    elapsed = perf_counter() - start
+    print(file=sys.stderr)
+
+    games = sum(total["games"] + total["timeouts"] for total in totals)
+    ticks = sum(total["ticks"] + total["timeouts"] * args.max_ticks
+                for total in totals)
+    report = {
+        "policy": args.policy,
+        "workers": args.workers,
+        "seconds": round(elapsed, 2),
+        "games_per_second": round(games / elapsed, 1),
+        "ticks_per_second": round(ticks / elapsed),
+        "variants": [dict(difficulty=difficulty, settings=overrides,
+                          **summarize(total,
+                                      variant_settings(overrides).tick_rate))
+                     for (difficulty, overrides), total
+                     in zip(variants, totals)],
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""Compare pygame's rect and mask collisions with the fleet grid.
+
+Run with `python bench_collisions.py`. For each fleet and bullet count it
+checks that the grid finds the same collisions as pygame, by rect and by
+mask, then times one tick's worth of bullet/alien and plane/alien tests,
+as after the fleet has moved, so the grid is built again.
+"""
+import os
+import random
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+from settings import Settings
+from game_sim import GameSim
+from collision import FleetGrid
+from bench_util import time_per_call
+
+FLEET_SIZES = [50, 400, 2000, 8000]
+BULLET_COUNTS = [3, 30, 300]
+
+
+def make_sim(fleet_size, bullet_count, seed=0):
+    """Build a simulation with a packed fleet and scattered bullets.
+
+    Returns the simulation and a Group of the bullets, for pygame.
+    """
+    settings = Settings()
+    settings.screen_width, settings.screen_height = 3840, 2160
+    sim = GameSim(settings)
+    width, height = sim.fleet.width, sim.fleet.height
+
+    # Pack the fleet with a little spacing so bullets can fall between.
+    columns = (settings.screen_width - 4 * width) // (width + 8)
+    positions = [(2 * width + (i % columns) * (width + 8),
+                  (i // columns) * (height // 2))
+                 for i in range(fleet_size)]
+    sim.fleet.build(positions)
+
+    rng = random.Random(seed)
+    bottom = max(y for x, y in positions) + height
+    bullets = pygame.sprite.Group()
+    for each in range(bullet_count):
+        bullet = sim.bullets.acquire()
+        bullet.rect.x = rng.randrange(0, settings.screen_width)
+        bullet.rect.y = rng.randrange(0, bottom)
+        bullets.add(bullet)
+    sim.plane.rect.x = positions[0][0]
+    sim.plane.rect.y = positions[0][1]
+    return sim, bullets
+
+
+def same_collisions(sim, bullets, grid, collided=None):
+    """Return True if the grid finds exactly what groupcollide finds."""
+    expected = pygame.sprite.groupcollide(bullets, sim.aliens,
+                                          False, False, collided)
+    found = grid.groupcollide(sim.bullets, kill=False)
+    plane_expected = bool(pygame.sprite.spritecollideany(
+        sim.plane, sim.aliens, collided))
+    return expected == found and plane_expected == grid.collideany(sim.plane)
+
+
+def main():
+    """Print a table of timings."""
+    print(f"{'aliens':>7} {'bullets':>8} {'groupcollide':>13} "
+          f"{'grid':>9} {'speedup':>8} {'collide_mask':>13} "
+          f"{'grid mask':>10} {'vs rect':>8}  same")
+    for fleet_size in FLEET_SIZES:
+        for bullet_count in BULLET_COUNTS:
+            sim, bullets = make_sim(fleet_size, bullet_count)
+            sim.fleet.sync_rects()
+            grid = sim.fleet_grid
+            mask_grid = FleetGrid(sim.fleet, masks=True)
+            collide_mask = pygame.sprite.collide_mask
+
+            def rect_tick():
+                pygame.sprite.groupcollide(bullets, sim.aliens, False, False)
+                pygame.sprite.spritecollideany(sim.plane, sim.aliens)
+
+            def grid_tick():
+                # As if the fleet had moved, so the grid is built again.
+                sim.fleet.version += 1
+                grid.groupcollide(sim.bullets, kill=False)
+                grid.collideany(sim.plane)
+
+            def mask_tick():
+                pygame.sprite.groupcollide(bullets, sim.aliens, False, False,
+                                           collide_mask)
+                pygame.sprite.spritecollideany(sim.plane, sim.aliens,
+                                               collide_mask)
+
+            def mask_grid_tick():
+                sim.fleet.version += 1
+                mask_grid.groupcollide(sim.bullets, kill=False)
+                mask_grid.collideany(sim.plane)
+
+            rect_time = time_per_call(rect_tick)
+            grid_time = time_per_call(grid_tick)
+            mask_time = time_per_call(mask_tick)
+            mask_grid_time = time_per_call(mask_grid_tick)
+            same = (same_collisions(sim, bullets, grid) and
+                    same_collisions(sim, bullets, mask_grid, collide_mask))
+            print(f"{fleet_size:>7} {bullet_count:>8} "
+                  f"{rect_time * 1e6:>11.1f}us {grid_time * 1e6:>7.1f}us "
+                  f"{rect_time / grid_time:>7.1f}x "
+                  f"{mask_time * 1e6:>11.1f}us {mask_grid_time * 1e6:>8.1f}us "
+                  f"{mask_grid_time / grid_time:>7.2f}x  {same}")
+
+
+if __name__ == '__main__':
+    main()
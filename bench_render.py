@@ -0,0 +1,78 @@
+"""Time one frame's drawing: a blit per sprite against the render queue.
+
+Run with `python bench_render.py`. For the default fleet and a dense 4K
+one it fills the render queue as the game does, then times drawing the
+frame with one blit() call per item and with the queue's batched
+blits() calls, and checks that both give the same pixels.
+"""
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+from settings import Settings
+from game_sim import Inputs
+from bench_util import time_per_call
+
+# name: (playfield size, fleet spacing)
+FLEETS = {
+    "default": ((1280, 720), 2),
+    "dense": ((3840, 2160), 1.1),
+}
+
+
+def make_game(size, spacing):
+    """Return a Horizongame a little way into a game, bullets flying."""
+    from alien_blaster import Horizongame
+    settings = Settings()
+    settings.screen_width, settings.screen_height = size
+    settings.fleet_spacing = spacing
+    settings.max_live_aliens = 2000
+    settings.bullet_allowed = 30
+    settings.audio = False
+    hg = Horizongame(settings)
+    hg.load()
+    hg.sim.step(Inputs(start="EASY"))
+    for tick in range(120):
+        hg.sim.step(Inputs(fire=1 if tick % 4 == 0 else 0))
+    hg._handle_sim_events()
+    return hg
+
+
+def main():
+    """Print a table of timings."""
+    print(f"{'fleet':>8} {'items':>6} {'queue':>9} {'per blit':>10} "
+          f"{'batched':>9} {'speedup':>8}  same")
+    for name, (size, spacing) in FLEETS.items():
+        hg = make_game(size, spacing)
+        screen = hg.display.frame
+        bg_color = hg.settings.bg_color
+        queue = hg._queue_items()
+
+        def per_blit():
+            screen.fill(bg_color)
+            for image, rect in queue:
+                screen.blit(image, rect)
+
+        def batched():
+            screen.fill(bg_color)
+            queue.submit(screen)
+
+        per_blit()
+        expected = pygame.image.tobytes(screen, "RGB")
+        batched()
+        same = expected == pygame.image.tobytes(screen, "RGB")
+
+        queue_time = time_per_call(hg._queue_items)
+        blit_time = time_per_call(per_blit)
+        batched_time = time_per_call(batched)
+        print(f"{name:>8} {len(queue):>6} {queue_time * 1e6:>7.1f}us "
+              f"{blit_time * 1e6:>8.1f}us {batched_time * 1e6:>7.1f}us "
+              f"{blit_time / batched_time:>7.2f}x  {same}")
+        pygame.display.quit()
+
+
+if __name__ == '__main__':
+    main()
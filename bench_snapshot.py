@@ -0,0 +1,76 @@
+"""Time saving and restoring the simulation's state, as rollback does.
+
+Run with `python bench_snapshot.py`. For the default fleet and a dense 4K
+one it plays a little way into a game with bullets and explosions about,
+then times a snapshot into a reused Snapshot, a restore, and a rollback of
+eight ticks: restore, then step the eight ticks again. It checks that a
+restore gives back exactly the state that was saved.
+"""
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from settings import Settings
+from game_sim import GameSim, Inputs, Snapshot
+from bench_util import time_per_call
+
+# name: (playfield size, fleet spacing)
+FLEETS = {
+    "default": ((1280, 720), 2),
+    "dense": ((3840, 2160), 1.1),
+}
+ROLLBACK_TICKS = 8
+
+
+def make_sim(size, spacing):
+    """Return a simulation a little way into a game, bullets flying."""
+    settings = Settings()
+    settings.screen_width, settings.screen_height = size
+    settings.fleet_spacing = spacing
+    settings.bullet_allowed = 30
+    settings.max_live_aliens = 2000
+    sim = GameSim(settings, seed=0)
+    sim.step(Inputs(start="EASY"))
+    for tick in range(240):
+        sim.step(Inputs(moving_up=tick % 120 < 60,
+                        moving_down=tick % 120 >= 60,
+                        fire=1 if tick % 4 == 0 else 0))
+    return sim
+
+
+def main():
+    """Print a table of timings."""
+    print(f"{'fleet':>8} {'aliens':>7} {'bullets':>8} {'snapshot':>9} "
+          f"{'restore':>9} {'cycle':>9} {'rollback':>9}  same")
+    for name, (size, spacing) in FLEETS.items():
+        sim = make_sim(size, spacing)
+        snap = sim.snapshot(Snapshot())
+        expected = sim.state_hash()
+        inputs = [Inputs(moving_up=True, fire=tick % 2)
+                  for tick in range(ROLLBACK_TICKS)]
+
+        def cycle():
+            sim.snapshot(snap)
+            sim.restore(snap)
+
+        def rollback():
+            sim.restore(snap)
+            for tick_inputs in inputs:
+                tick_inputs.fire = 1
+                sim.step(tick_inputs)
+
+        snapshot_time = time_per_call(lambda: sim.snapshot(snap))
+        restore_time = time_per_call(lambda: sim.restore(snap))
+        cycle_time = time_per_call(cycle)
+        same = sim.state_hash() == expected
+        rollback_time = time_per_call(rollback)
+        sim.restore(snap)
+        same = same and sim.state_hash() == expected
+        print(f"{name:>8} {len(sim.fleet):>7} {len(sim.bullets):>8} "
+              f"{snapshot_time * 1e6:>7.1f}us {restore_time * 1e6:>7.1f}us "
+              f"{cycle_time * 1e6:>7.1f}us {rollback_time * 1e6:>7.1f}us  "
+              f"{same}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,14 @@
+"""Helpers shared by the bench_*.py microbenchmarks."""
+from time import perf_counter
+
+
+def time_per_call(func, min_time=0.3):
+    """Return the average seconds per call of func, called for min_time."""
+    calls = 0
+    start = perf_counter()
+    while True:
+        func()
+        calls += 1
+        elapsed = perf_counter() - start
+        if elapsed >= min_time:
+            return elapsed / calls
@@ -0,0 +1,239 @@
+"""Scripted performance benchmarks for Alien Blaster.
+
+Each scenario plays the game headless with canned input and reports
+ticks per second, the median and 99th percentile tick time, and peak
+memory, as JSON so runs can be compared across commits:
+
+    python benchmark.py                       # every scenario
+    python benchmark.py default sustained_fire --ticks 5000
+    python benchmark.py --render -o bench_output.json
+
+By default only the simulation is stepped; with --render a Horizongame
+also draws every frame under the SDL dummy video driver.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tracemalloc
+from time import perf_counter_ns
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+from settings import Settings
+from game_sim import GameSim, Inputs, PLAYING
+
+
+def default_settings(settings):
+    """The game as it ships."""
+
+
+def dense_settings(settings):
+    """A tightly packed fleet on a fullscreen 4K playfield."""
+    settings.screen_width, settings.screen_height = 3840, 2160
+    settings.fleet_spacing = 1.1
+    settings.max_live_aliens = 2000
+
+
+def rapid_fire_settings(settings):
+    """Lots of bullets in the air at once."""
+    settings.bullet_allowed = 100
+
+
+# name: (change the settings, difficulty, fire every n ticks,
+#        explosions added per tick)
+SCENARIOS = {
+    "default": (default_settings, "EASY", 20, 0),
+    "dense_fullscreen": (dense_settings, "EASY", 20, 0),
+    "sustained_fire": (rapid_fire_settings, "NORMAL", 1, 0),
+    "explosion_storm": (default_settings, "EASY", 20, 20),
+}
+
+
+class CannedInput:
+    """Sweep the plane up and down and fire on a fixed rhythm."""
+
+    def __init__(self, difficulty, fire_every, sweep=90):
+        """Initialize the input pattern."""
+        self.inputs = Inputs(start=difficulty)
+        self.difficulty = difficulty
+        self.fire_every = fire_every
+        self.sweep = sweep
+
+    def next(self, sim):
+        """Return the input for the simulation's next tick."""
+        tick = sim.ticks
+        self.inputs.moving_up = (tick // self.sweep) % 2 == 0
+        self.inputs.moving_down = not self.inputs.moving_up
+        self.inputs.fire = 1 if tick % self.fire_every == 0 else 0
+        if not sim.game_active:
+            # Start over after a game over.
+            self.inputs.start = self.difficulty
+        return self.inputs
+
+
+def make_game(settings, render):
+    """Return (sim, draw) where draw() renders a frame, or is None."""
+    if render:
+        from alien_blaster import Horizongame
+        settings.audio = False
+        hg = Horizongame(settings)
+        hg.load()
+
+        def draw():
+            hg._handle_sim_events()
+            hg._update_screen()
+        return hg.sim, draw
+    return GameSim(settings), None
+
+
+def run_scenario(name, ticks, render=False, seed=0, settle=5000,
+                 max_warmup=50000):
+    """Play a scenario and return its measurements.
+
+    Before measuring, the game is played until the pools have gone
+    `settle` ticks without growing, or for max_warmup ticks at most.
+    Explosions are only added while the game is being played; a death or
+    level-clear sequence waits for every explosion to finish.
+    """
+    change_settings, difficulty, fire_every, storm = SCENARIOS[name]
+    settings = Settings()
+    change_settings(settings)
+    sim, draw = make_game(settings, render)
+    canned = CannedInput(difficulty, fire_every)
+    rng = random.Random(seed)
+
+    def tick():
+        sim.step(canned.next(sim))
+        for each in range(storm if sim.state == PLAYING else 0):
+            explosion = sim.explosions.acquire()
+            explosion.reset((rng.randrange(settings.screen_width),
+                             rng.randrange(settings.screen_height)))
+        if draw:
+            draw()
+        else:
+            sim.events.clear()
+
+    # Warm up the caches and pools before measuring. A pool can go a
+    # long while before the next crowded moment makes it grow again.
+    warmup = settled = 0
+    allocations = sim.allocations
+    while settled < settle and warmup < max_warmup:
+        tick()
+        warmup += 1
+        settled += 1
+        if sim.allocations != allocations:
+            allocations = sim.allocations
+            settled = 0
+
+    times = []
+    playing_ticks = 0
+    start = perf_counter_ns()
+    for each in range(ticks):
+        tick_start = perf_counter_ns()
+        tick()
+        times.append(perf_counter_ns() - tick_start)
+        playing_ticks += sim.state == PLAYING
+    elapsed = perf_counter_ns() - start
+
+    # Memory is measured in a separate, shorter pass; tracing slows
+    # everything down.
+    tracemalloc.start()
+    for each in range(min(ticks, 1000)):
+        tick()
+    traced_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    times.sort()
+    return {
+        "ticks": ticks,
+        "warmup_ticks": warmup,
+        "playing_ticks": playing_ticks,
+        "ticks_per_second": round(ticks / (elapsed / 1e9), 1),
+        "p50_ms": round(times[len(times) // 2] / 1e6, 4),
+        "p99_ms": round(times[min(len(times) - 1,
+                                  int(len(times) * 0.99))] / 1e6, 4),
+        "max_ms": round(times[-1] / 1e6, 4),
+        "peak_traced_kb": traced_peak // 1024,
+        "aliens": len(sim.fleet),
+        "level": sim.stats.level,
+        "score": sim.stats.score,
+        "steady_state_allocations": sim.allocations - allocations,
+    }
+
+
+def peak_rss_kb():
+    """Return the process's peak resident memory, where it can be read."""
+    try:
+        import resource
+    except ImportError:
+        # Not available on Windows.
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def git_commit():
+    """Return the current commit, if this is a git checkout."""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                              capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    """Run the chosen scenarios and print or save the report.
+
+    Returns 1 if a scenario never got to play during its measured ticks,
+    so it measured a death or level-clear sequence and nothing else.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("scenarios", nargs="*",
+                        help="scenarios to run (default: all): " +
+                        ", ".join(SCENARIOS))
+    parser.add_argument("--ticks", type=int, default=3000)
+    parser.add_argument("--settle", type=int, default=5000,
+                        help="warm up until the pools go this many ticks "
+                        "without growing")
+    parser.add_argument("--render", action="store_true",
+                        help="also draw every frame")
+    parser.add_argument("-o", "--output", help="write the JSON here")
+    args = parser.parse_args(argv)
+    for name in args.scenarios:
+        if name not in SCENARIOS:
+            parser.error(f"unknown scenario: {name}")
+
+    results = {}
+    for name in args.scenarios or SCENARIOS:
+        results[name] = run_scenario(name, args.ticks, args.render,
+                                     settle=args.settle)
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "render": args.render,
+        "peak_rss_kb": peak_rss_kb(),
+        "scenarios": results,
+        "failures": [f"{name}: never in play while measured"
+                     for name, result in results.items()
+                     if not result["playing_ticks"]],
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+    return 1 if report["failures"] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
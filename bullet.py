@@ -1,5 +1,7 @@
 import pygame
 
+from assets import assets
+
 class Bullet(pygame.sprite.Sprite):
     """A class to manage bullets fired from the ship."""
 
@@ -10,12 +12,22 @@ class Bullet(pygame.sprite.Sprite):
         self.settings = h_game.settings
 
         # Load the image of the bullet and set its rect attribute.
-        self.image = pygame.image.load("images/missile.png")
+        self.image = assets.image("missile")
         self.rect = self.image.get_rect()
-        self.rect.midright = h_game.plane.rect.midright
+        # Shared by every bullet, for pixel-accurate collisions.
+        self.mask = assets.mask("missile")
+        self.reset(h_game.plane)
+
+    def reset(self, plane):
+        """Put the bullet back at the front of the plane, ready to fire."""
+        self.rect.midright = plane.rect.midright
         self.rect.x -= 4 # make it a little backward
 
         self.x = float(self.rect.x)
+
+    def refresh_image(self):
+        """Take the image again, once it's been converted for a new display."""
+        self.image = assets.image("missile")
     
     def update(self):
         """Move the bullet to right of the screen"""
@@ -0,0 +1,179 @@
+"""Pack the game's images and sounds into one memory-mapped bundle.
+
+Images are stored as raw pixels in the display's usual 32-bit format,
+along with the explosion frames and the scaled variants the game uses,
+so loading one is a matter of pointing a surface at the mapped file.
+Sounds and music are stored as the files they came from. Build the
+bundle after changing anything under images/ or sounds/:
+
+    python bundle.py
+
+The game falls back to the loose files when there is no bundle, or when
+it's older than the files it was built from.
+"""
+import io
+import json
+import mmap
+import os
+import struct
+import sys
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+
+BUNDLE_PATH = "assets.bundle"
+MAGIC = b"ABBD"
+VERSION = 1
+# Blobs start on cache line boundaries.
+ALIGN = 64
+# Magic, version, and the offset and size of the JSON index.
+HEADER = struct.Struct("<4sBQI")
+# ARGB8888 in memory on a little-endian machine, which is what
+# convert_alpha() gives on the usual displays.
+PIXEL_FORMAT = "BGRA"
+
+# Which sizes of each image and sprite sheet to store.
+IMAGE_VARIANTS = {
+    "alien": (1,),
+    "missile": (1,),
+    # Half size for the lives left on the scoreboard.
+    "plane": (1, 0.5),
+}
+FRAME_VARIANTS = {
+    # Full size for hits, double for the plane going down.
+    "explosion": (1, 2),
+}
+SOUND_FILES = ("sounds/bullet.wav", "sounds/explode.wav", "sounds/War2.mp3")
+
+
+def variant_key(name, scale):
+    """Return the index key of an image or frame list at a scale."""
+    return f"{name}@{float(scale):g}"
+
+
+class Bundle:
+    """A built bundle, mapped into memory."""
+
+    def __init__(self, path=BUNDLE_PATH):
+        """Map the bundle and read its index."""
+        with open(path, "rb") as file:
+            # Copy-on-write, so the pages are shared until something
+            # draws on an image, and the file itself never changes.
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)
+        if len(self.map) < HEADER.size or self.map[:4] != MAGIC:
+            raise ValueError(f"{path} is not an asset bundle")
+        magic, version, start, size = HEADER.unpack_from(self.map)
+        if version != VERSION:
+            raise ValueError(f"{path} is version {version}, expected {VERSION}")
+        self.index = json.loads(self.map[start:start + size])
+        self.view = memoryview(self.map)
+
+    def is_stale(self):
+        """Return True if a source file changed since the bundle was built."""
+        for path, (size, mtime) in self.index["sources"].items():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if stat.st_size != size or stat.st_mtime_ns > mtime:
+                return True
+        return False
+
+    def image(self, name, scale=1):
+        """Return a surface over the stored image, or None."""
+        entry = self.index["images"].get(variant_key(name, scale))
+        return self._surface(entry) if entry else None
+
+    def frames(self, name, scale=1):
+        """Return surfaces over the stored frames of a sheet, or None."""
+        entries = self.index["frames"].get(variant_key(name, scale))
+        if entries is None:
+            return None
+        return [self._surface(entry) for entry in entries]
+
+    def file(self, path):
+        """Return a stored sound file as a file object, or None."""
+        entry = self.index["files"].get(path)
+        if entry is None:
+            return None
+        offset, length = entry
+        return io.BytesIO(self.view[offset:offset + length])
+
+    def _surface(self, entry):
+        """Point a surface at an image's pixels, without decoding."""
+        offset, width, height = entry
+        pixels = self.view[offset:offset + width * height * 4]
+        return pygame.image.frombuffer(pixels, (width, height), PIXEL_FORMAT)
+
+
+def open_bundle(path=BUNDLE_PATH):
+    """Return the bundle if there's an up-to-date one, else None."""
+    if not os.path.exists(path):
+        return None
+    try:
+        bundle = Bundle(path)
+    except (OSError, ValueError):
+        return None
+    return None if bundle.is_stale() else bundle
+
+
+def build(path=BUNDLE_PATH):
+    """Load every asset from the loose files and pack them into path."""
+    # The images are prepared exactly as the game prepares loose files.
+    from assets import Assets, IMAGE_FILES
+    loose = Assets(bundle_path=None)
+
+    # Room for the header; the offsets in the index are from the start.
+    blobs = bytearray(ALIGN)
+    index = {"images": {}, "frames": {}, "files": {}, "sources": {}}
+
+    def add(data):
+        """Append a blob at an aligned offset; return the offset."""
+        blobs.extend(bytes(-len(blobs) % ALIGN))
+        offset = len(blobs)
+        blobs.extend(data)
+        return offset
+
+    def add_surface(surface):
+        """Append an image's pixels; return its index entry."""
+        width, height = surface.get_size()
+        pixels = pygame.image.tobytes(surface, PIXEL_FORMAT)
+        return [add(pixels), width, height]
+
+    for name, scales in IMAGE_VARIANTS.items():
+        for scale in scales:
+            index["images"][variant_key(name, scale)] = add_surface(
+                loose.image(name, scale))
+    for name, scales in FRAME_VARIANTS.items():
+        for scale in scales:
+            index["frames"][variant_key(name, scale)] = [
+                add_surface(frame) for frame in loose.frames(name, scale)]
+    for sound in SOUND_FILES:
+        with open(sound, "rb") as file:
+            data = file.read()
+        index["files"][sound] = [add(data), len(data)]
+
+    for source in list(IMAGE_FILES.values()) + list(SOUND_FILES):
+        stat = os.stat(source)
+        index["sources"][source] = [stat.st_size, stat.st_mtime_ns]
+
+    # The index goes at the end, where the header says it is.
+    index_data = json.dumps(index).encode()
+    HEADER.pack_into(blobs, 0, MAGIC, VERSION, len(blobs), len(index_data))
+    with open(path, "wb") as file:
+        file.write(blobs)
+        file.write(index_data)
+    return len(blobs)
+
+
+def main(argv=None):
+    """Build the bundle."""
+    args = sys.argv[1:] if argv is None else argv
+    path = args[0] if args else BUNDLE_PATH
+    size = build(path)
+    print(f"{path}: {size / 1024:.0f} KiB")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,6 @@
-import pygame.font
+import pygame
+
+from hud_text import get_font
 
 class Button:
     """A class to build buttons for the game."""
@@ -13,7 +15,7 @@ class Button:
         self.button_color = (150, 200, 0)
         self.text_color = (255, 255, 255)
         # self.text_color = (255, 255, 255)  # Default text color
-        self.font = pygame.font.SysFont(None, 48)
+        self.font = get_font(48)
 
         # Build the button's rect object and center it.
         self.rect = pygame.Rect(0, 0, self.width, self.height)
@@ -28,8 +30,9 @@ class Button:
                                           self.button_color)
         self.msg_image_rect = self.msg_image.get_rect()
         self.msg_image_rect.center = self.rect.center
-    
-    def draw_button(self):
-        """Draw blank button and then draw message."""
-        self.screen.fill(self.button_color, self.rect)
-        self.screen.blit(self.msg_image, self.msg_image_rect)
\ No newline at end of file
+
+        # The whole button as one image, so it can be drawn in one blit.
+        self.image = pygame.Surface(self.rect.size)
+        self.image.fill(self.button_color)
+        self.image.blit(self.msg_image, self.msg_image.get_rect(
+            center=self.image.get_rect().center))
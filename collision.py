@@ -0,0 +1,215 @@
+import numpy as np
+import pygame
+
+
+class FleetGrid:
+    """A uniform grid over the fleet for finding the aliens near rects.
+
+    Each living alien is filed under the grid cell holding its top-left
+    corner, and the aliens are kept sorted by cell. The grid is rebuilt with
+    a few array operations whenever the fleet has moved. A query then looks
+    up the cells around all rects at once and only tests the aliens found
+    there, instead of testing every rect against the whole fleet.
+
+    Building the grid costs more than it saves for a small fleet. Up to
+    rect_aliens aliens, the rects are tested against plain Rects of the
+    living aliens with Rect.collidelistall(). Up to brute_force_pairs
+    rect/alien pairs, every pair is tested at once in arrays.
+
+    With `masks`, pairs whose rects overlap are then tested pixel by pixel
+    with the sprites' shared masks, so transparent corners don't count.
+    Only the few pairs that get past the rect test pay for it.
+    """
+
+    # Cell coordinates are packed into one key; this keeps them positive.
+    _OFFSET = 1 << 20
+
+    # Up to this many living aliens, Rect.collidelistall() is cheapest.
+    rect_aliens = 48
+    # Up to this many rect/alien pairs, testing them all is cheaper.
+    brute_force_pairs = 4096
+
+    def __init__(self, fleet, cell_width=None, cell_height=None, masks=False):
+        """Initialize the grid; cells default to the size of an alien."""
+        self.fleet = fleet
+        self.cell_width = cell_width if cell_width else fleet.width
+        self.cell_height = cell_height if cell_height else fleet.height
+        self.masks = masks
+        self._version = None
+        # The living aliens' fleet indexes and Rects, for rect_aliens.
+        # The Rects are reused, moved into place when the fleet changes.
+        self._rects_version = None
+        self._rect_indices = []
+        self._rects = []
+        self._live_rects = []
+
+    def rebuild(self):
+        """File every living alien under its cell, sorted by cell."""
+        fleet = self.fleet
+        indices = np.flatnonzero(fleet.alive)
+        left = fleet.x[indices]
+        top = np.rint(fleet.y[indices])
+        keys = self._keys(
+            np.floor_divide(left, self.cell_width).astype(np.int64),
+            np.floor_divide(top, self.cell_height).astype(np.int64))
+
+        order = np.argsort(keys, kind="stable")
+        self._keys_sorted = keys[order]
+        self._indices = indices[order]
+        self._left = left[order]
+        self._top = top[order]
+        self._version = fleet.version
+
+    def pairs(self, rects):
+        """Find every overlap between the rects and the living aliens.
+
+        Returns two arrays, the position of the rect in `rects` and the
+        fleet index of the alien, sorted by rect and then by alien.
+        """
+        fleet = self.fleet
+        if not rects or not fleet.alive_count:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty
+        if fleet.alive_count <= self.rect_aliens:
+            return self._test_rects(rects)
+
+        boxes = np.array([(r.left, r.top, r.right, r.bottom) for r in rects],
+                         dtype=np.int64)
+        if len(rects) * fleet.alive_count <= self.brute_force_pairs:
+            return self._test_all(boxes)
+        if self._version != fleet.version:
+            self.rebuild()
+        rect_ids, slots = self._test_nearby(boxes)
+        aliens = self._indices[slots]
+        order = np.lexsort((aliens, rect_ids))
+        return rect_ids[order], aliens[order]
+
+    def collideany(self, sprite):
+        """Return True if any living alien overlaps the sprite."""
+        rect_ids, aliens = self.pairs([sprite.rect])
+        if self.masks:
+            return any(self._masks_overlap(sprite, alien)
+                       for alien in aliens.tolist())
+        return bool(len(aliens))
+
+    def groupcollide(self, sprites, kill=True):
+        """Find the aliens hit by each sprite, like pygame's groupcollide.
+
+        Returns a dict mapping each sprite that hit something to the list
+        of alien sprites it hit. With `kill`, both are removed as they're
+        found, so an alien is only ever hit once.
+        """
+        collisions = {}
+        sprites = list(sprites)
+        rect_ids, aliens = self.pairs([sprite.rect for sprite in sprites])
+        if not len(aliens):
+            return collisions
+
+        fleet = self.fleet
+        fleet_sprites = fleet.sprites
+        destroyed = set()
+        for rect_id, alien in zip(rect_ids.tolist(), aliens.tolist()):
+            if kill and alien in destroyed:
+                # Already destroyed by an earlier sprite.
+                continue
+            sprite = sprites[rect_id]
+            if self.masks and not self._masks_overlap(sprite, alien):
+                continue
+            if kill:
+                destroyed.add(alien)
+            collisions.setdefault(sprite, []).append(fleet_sprites[alien])
+
+        if kill:
+            for sprite, hit in collisions.items():
+                sprite.kill()
+                for alien in hit:
+                    fleet.kill(alien.index)
+        return collisions
+
+    def _masks_overlap(self, sprite, alien):
+        """Return True if the sprite's mask touches an alien's."""
+        fleet = self.fleet
+        offset = (int(fleet.x[alien]) - sprite.rect.x,
+                  int(np.rint(fleet.y[alien])) - sprite.rect.y)
+        return sprite.mask.overlap(fleet.sprites[alien].mask,
+                                   offset) is not None
+
+    def _test_rects(self, rects):
+        """Find the pairs with Rect.collidelistall(), one rect at a time."""
+        fleet = self.fleet
+        if self._rects_version != fleet.version:
+            indices = np.flatnonzero(fleet.alive)
+            xs = fleet.x[indices].astype(int).tolist()
+            ys = np.rint(fleet.y[indices]).astype(int).tolist()
+            own = self._rects
+            for count in range(len(own), len(xs)):
+                own.append(pygame.Rect(0, 0, fleet.width, fleet.height))
+            for rect, x, y in zip(own, xs, ys):
+                rect.topleft = (x, y)
+            self._live_rects = own[:len(xs)]
+            self._rect_indices = indices.tolist()
+            self._rects_version = fleet.version
+
+        rect_ids, aliens = [], []
+        indices = self._rect_indices
+        for rect_id, rect in enumerate(rects):
+            hits = rect.collidelistall(self._live_rects)
+            if hits:
+                # The living aliens are in fleet order already.
+                rect_ids.extend([rect_id] * len(hits))
+                aliens.extend([indices[slot] for slot in hits])
+        return (np.array(rect_ids, dtype=np.int64),
+                np.array(aliens, dtype=np.int64))
+
+    def _test_all(self, boxes):
+        """Test every rect against every living alien, without the grid.
+
+        The pairs come out sorted by rect and then by alien as they are.
+        """
+        fleet = self.fleet
+        indices = np.flatnonzero(fleet.alive)
+        hits = self._overlaps(boxes[:, None, :], fleet.x[None, indices],
+                              np.rint(fleet.y[None, indices]))
+        rect_ids, slots = np.nonzero(hits)
+        return rect_ids, indices[slots]
+
+    def _test_nearby(self, boxes):
+        """Test each rect against the aliens in the cells around it."""
+        width, height = self.fleet.width, self.fleet.height
+        # An alien overlapping a rect has its corner within one alien size
+        # above and to the left of it.
+        col_first = (boxes[:, 0] - width) // self.cell_width
+        col_last = (boxes[:, 2] - 1) // self.cell_width
+        row_first = (boxes[:, 1] - height) // self.cell_height
+        row_last = (boxes[:, 3] - 1) // self.cell_height
+
+        # One (rect, column) strip per cell column a rect covers; within a
+        # column the rows are contiguous in the sorted keys.
+        spans = col_last - col_first + 1
+        rect_ids = np.repeat(np.arange(len(boxes)), spans)
+        cols = (np.repeat(col_first - np.cumsum(spans) + spans, spans) +
+                np.arange(spans.sum()))
+        keys = self._keys_sorted
+        lo = keys.searchsorted(self._keys(cols, row_first[rect_ids]), "left")
+        hi = keys.searchsorted(self._keys(cols, row_last[rect_ids]), "right")
+
+        # Expand the strips into candidate (rect, slot) pairs.
+        counts = hi - lo
+        rect_ids = np.repeat(rect_ids, counts)
+        slots = (np.repeat(lo - np.cumsum(counts) + counts, counts) +
+                 np.arange(counts.sum()))
+
+        hits = self._overlaps(boxes[rect_ids], self._left[slots],
+                              self._top[slots])
+        return rect_ids[hits], slots[hits]
+
+    def _overlaps(self, boxes, left, top):
+        """Test rects against aliens the way Rect.colliderect does."""
+        return ((left < boxes[..., 2]) &
+                (left + self.fleet.width > boxes[..., 0]) &
+                (top < boxes[..., 3]) &
+                (top + self.fleet.height > boxes[..., 1]))
+
+    def _keys(self, col, row):
+        """Pack cell coordinates into a single sortable key."""
+        return (col + self._OFFSET) * (self._OFFSET * 2) + (row + self._OFFSET)
@@ -0,0 +1,95 @@
+import weakref
+
+import pygame
+
+
+class Display:
+    """The window, and the fixed-size frame the game is drawn into.
+
+    The game is laid out on a logical playfield of the settings' size,
+    whatever the window or monitor. Frames are drawn at that size times
+    render_scale and shown scaled to fit the window: by SDL with
+    pygame.SCALED where it can, or with one scaling blit where it can't.
+    A render scale below 1 draws fewer pixels on slower machines.
+    """
+
+    def __init__(self, settings):
+        """Initialize and open the window."""
+        self.logical_size = (settings.screen_width, settings.screen_height)
+        self.render_scale = settings.render_scale
+        self.size = (round(settings.screen_width * self.render_scale),
+                     round(settings.screen_height * self.render_scale))
+        # Images redrawn at the render scale, dropped with their originals.
+        self._scaled_images = weakref.WeakKeyDictionary()
+        self.set_mode(settings.fullscreen)
+
+    def set_mode(self, fullscreen=False):
+        """Open the window, or switch it to or from fullscreen."""
+        flags = pygame.FULLSCREEN if fullscreen else 0
+        self.window = None
+        # A window the size of the playfield needs no scaling, and SCALED
+        # isn't free without a GPU.
+        if fullscreen or self.size != self.logical_size:
+            try:
+                self.window = pygame.display.set_mode(self.size,
+                                                      pygame.SCALED | flags)
+            except pygame.error:
+                # No renderer to scale with; do it ourselves.
+                pass
+        if self.window is None:
+            self.window = pygame.display.set_mode(
+                (0, 0) if fullscreen else self.logical_size, flags)
+        if self.window.get_size() == self.size:
+            self.frame = self.window
+            self.viewport = self.window.get_rect()
+        else:
+            self.frame = pygame.Surface(self.size, 0, self.window)
+            # As large as fits, keeping the aspect ratio, centered.
+            window = self.window.get_rect()
+            fit = min(window.width / self.size[0],
+                      window.height / self.size[1])
+            self.viewport = pygame.Rect(0, 0, int(self.size[0] * fit),
+                                        int(self.size[1] * fit))
+            self.viewport.center = window.center
+            self.window.fill((0, 0, 0))
+        self._scaled_images.clear()
+
+    def scale_queue(self, queue):
+        """Map a RenderQueue's items from the playfield onto the frame."""
+        scale = self.render_scale
+        if scale == 1:
+            return queue
+        scaled_images = self._scaled_images
+        for layer in queue.layers:
+            scaled = []
+            for image, rect in layer:
+                scaled_image = scaled_images.get(image)
+                if scaled_image is None:
+                    scaled_image = pygame.transform.scale(image, (
+                        max(1, round(image.get_width() * scale)),
+                        max(1, round(image.get_height() * scale))))
+                    scaled_images[image] = scaled_image
+                scaled.append((scaled_image, scaled_image.get_rect(
+                    topleft=(round(rect.x * scale), round(rect.y * scale)))))
+            layer[:] = scaled
+        return queue
+
+    def present(self, dirty=None):
+        """Show the frame; dirty lists the changed areas, None for all."""
+        if self.frame is self.window:
+            if dirty is None:
+                pygame.display.flip()
+            elif dirty:
+                pygame.display.update(dirty)
+        elif dirty is None or dirty:
+            pygame.transform.scale(self.frame, self.viewport.size,
+                                   self.window.subsurface(self.viewport))
+            pygame.display.update(self.viewport)
+
+    def to_logical(self, position):
+        """Turn a mouse position in the window into playfield coordinates."""
+        x, y = position
+        if self.frame is not self.window:
+            x = (x - self.viewport.x) * self.size[0] / self.viewport.width
+            y = (y - self.viewport.y) * self.size[1] / self.viewport.height
+        return (int(x / self.render_scale), int(y / self.render_scale))
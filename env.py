@@ -0,0 +1,377 @@
+"""Gym-style environments for training agents on the game.
+
+BlasterEnv wraps one headless GameSim with reset() and step(). Each step
+is one tick; the action is an index into ACTIONS and the reward is the
+score gained. An observation is either a state vector or the rendered
+frame, written straight into an array the caller can hand in, so a batch
+of environments fills one preallocated batch array without copying.
+
+VecBlasterEnv steps N environments in one call in this process;
+SubprocVecEnv spreads them over worker processes whose observations live
+in shared memory. Measure the throughput with:
+
+    python env.py --envs 64 --workers 8
+"""
+import argparse
+import copy
+import multiprocessing
+import os
+from multiprocessing import shared_memory
+from time import perf_counter
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import numpy as np
+import pygame
+
+from settings import Settings
+from game_sim import GameSim, Inputs
+
+# (moving up, moving down, fire) for each action.
+ACTIONS = (
+    (False, False, 0),
+    (True, False, 0),
+    (False, True, 0),
+    (False, False, 1),
+    (True, False, 1),
+    (False, True, 1),
+)
+
+
+class BlasterEnv:
+    """One game, stepped a tick at a time by an agent."""
+
+    def __init__(self, settings=None, obs_type="state", pixel_size=None,
+                 difficulty="EASY", max_ticks=None, out=None):
+        """Initialize the environment.
+
+        obs_type is "state" or "pixels". Pixels are the full playfield, or
+        scaled to pixel_size=(width, height). If out is given, it must have
+        the shape of buffer_shape and observations are written into it
+        rather than into an array of the environment's own.
+        """
+        self.settings = settings if settings else Settings()
+        self.obs_type = obs_type
+        self.difficulty = difficulty
+        self.max_ticks = max_ticks
+        self.inputs = Inputs()
+        self.sim = GameSim(self.settings, seed=0)
+
+        # The fleet never holds more aliens than this.
+        fleet_size = self.settings.max_live_aliens
+        if obs_type == "state":
+            # Plane y, lives, then x, y for each bullet slot and x, y,
+            # alive for each alien, all scaled to about 0-1.
+            shape = (2 + 2 * self.settings.bullet_allowed + 3 * fleet_size,)
+            self.buffer_shape = shape
+            dtype = np.float32
+        elif obs_type == "pixels":
+            width, height = pixel_size or (self.settings.screen_width,
+                                           self.settings.screen_height)
+            shape = (height, width, 3)
+            # Pixels are kept as RGBX, the byte order the images load in,
+            # which blits several times faster than packed RGB. The
+            # observation is a view of the first three channels.
+            self.buffer_shape = (height, width, 4)
+            dtype = np.uint8
+        else:
+            raise ValueError(f"unknown obs_type {obs_type!r}")
+        self.observation_shape = shape
+        self.observation_dtype = dtype
+        self.action_count = len(ACTIONS)
+
+        if out is None:
+            out = np.zeros(self.buffer_shape, dtype)
+        elif out.shape != self.buffer_shape or out.dtype != dtype:
+            raise ValueError(
+                f"out must be {dtype.__name__} {self.buffer_shape}")
+        self.obs = out
+
+        if obs_type == "pixels":
+            self.obs = out[..., :3]
+            # A surface drawing straight into the observation array.
+            self.frame = pygame.image.frombuffer(out, (width, height), "RGBX")
+            if pixel_size is None:
+                # The game draws on the observation itself.
+                self.sim.resize(self.frame)
+            else:
+                # Scaling needs both surfaces in the same pixel format.
+                self.sim.resize(pygame.Surface(
+                    (self.settings.screen_width, self.settings.screen_height),
+                    0, self.frame))
+
+    def reset(self, seed=None):
+        """Start a new game; return (observation, info)."""
+        self.sim = GameSim(self.settings, self.sim.screen, seed)
+        self.inputs = Inputs(start=self.difficulty)
+        self.sim.step(self.inputs)
+        self.sim.events.clear()
+        self._observe()
+        return self.obs, {"seed": self.sim.seed}
+
+    def step(self, action):
+        """Play one tick.
+
+        Return (observation, reward, terminated, truncated, info) the way
+        Gymnasium does. terminated means the game is over.
+        """
+        sim = self.sim
+        inputs = self.inputs
+        inputs.moving_up, inputs.moving_down, inputs.fire = ACTIONS[action]
+        score = sim.stats.score
+        sim.step(inputs)
+        sim.events.clear()
+        self._observe()
+
+        terminated = not sim.game_active
+        truncated = (not terminated and self.max_ticks is not None and
+                     sim.ticks >= self.max_ticks)
+        return (self.obs, sim.stats.score - score, terminated, truncated,
+                {"score": sim.stats.score, "level": sim.stats.level})
+
+    def _observe(self):
+        """Write the current observation into self.obs."""
+        if self.obs_type == "state":
+            self._observe_state()
+        else:
+            self._observe_pixels()
+
+    def _observe_state(self):
+        """Write the state vector."""
+        sim, obs = self.sim, self.obs
+        width = self.settings.screen_width
+        height = self.settings.screen_height
+        obs[0] = sim.plane.y / height
+        obs[1] = sim.stats.plane_left / self.settings.plane_limit
+
+        # Empty bullet slots are -1.
+        slots = obs[2:2 + 2 * self.settings.bullet_allowed]
+        slots[:] = -1.0
+        for number, bullet in enumerate(sim.bullets):
+            slots[2 * number] = bullet.x / width
+            slots[2 * number + 1] = bullet.rect.y / height
+
+        fleet = sim.fleet
+        aliens = obs[2 + 2 * self.settings.bullet_allowed:].reshape(-1, 3)
+        # Slots past the fleet's are empty.
+        count = min(len(fleet.x), len(aliens))
+        aliens[count:] = 0.0
+        aliens = aliens[:count]
+        aliens[:, 0] = fleet.x[:count]
+        aliens[:, 0] /= width
+        aliens[:, 1] = fleet.y[:count]
+        aliens[:, 1] /= height
+        aliens[:, 2] = fleet.alive[:count]
+
+    def _observe_pixels(self):
+        """Draw the playfield into the observation."""
+        sim = self.sim
+        screen = sim.screen
+        screen.fill(self.settings.bg_color)
+        screen.blits([(bullet.image, bullet.rect) for bullet in sim.bullets],
+                     False)
+        screen.blit(sim.plane.image, sim.plane.rect)
+        sim.fleet.sync_rects()
+        screen.blits([(alien.image, alien.rect) for alien in sim.aliens],
+                     False)
+        screen.blits([(explosion.image, explosion.rect)
+                      for explosion in sim.explosions], False)
+        if screen is not self.frame:
+            pygame.transform.scale(screen, self.frame.get_size(), self.frame)
+
+
+class VecBlasterEnv:
+    """N environments stepped together, with one batch of observations.
+
+    Finished games are reset on the spot, so the observation returned for
+    them is the first of the next game. Environment i plays seeds
+    seed + i, seed + i + stride, ... so no two games repeat.
+    """
+
+    def __init__(self, num_envs, settings=None, out=None, seed=0,
+                 stride=None, **kwargs):
+        """Initialize num_envs environments; kwargs go to BlasterEnv."""
+        settings = settings if settings else Settings()
+        probe = BlasterEnv(copy.deepcopy(settings), **kwargs)
+        shape = (num_envs,) + probe.buffer_shape
+        if out is None:
+            out = np.zeros(shape, probe.observation_dtype)
+        # The batch of observations, a view when the buffer holds more.
+        self.obs = out[..., :probe.observation_shape[-1]]
+        self.envs = [BlasterEnv(copy.deepcopy(settings), out=out[number],
+                                **kwargs)
+                     for number in range(num_envs)]
+        self.num_envs = num_envs
+        self.seed = seed
+        self.stride = stride or num_envs
+        # Games started by each environment.
+        self.games = [0] * num_envs
+        self.rewards = np.zeros(num_envs, dtype=np.float32)
+        self.terminated = np.zeros(num_envs, dtype=bool)
+        self.truncated = np.zeros(num_envs, dtype=bool)
+
+    def reset(self):
+        """Start a game in every environment; return the observations."""
+        for number in range(self.num_envs):
+            self._reset(number)
+        return self.obs
+
+    def step(self, actions):
+        """Step every environment by one tick.
+
+        Return (observations, rewards, terminated, truncated) as arrays
+        that are reused from call to call.
+        """
+        for number, env in enumerate(self.envs):
+            obs, reward, terminated, truncated, info = env.step(
+                actions[number])
+            self.rewards[number] = reward
+            self.terminated[number] = terminated
+            self.truncated[number] = truncated
+            if terminated or truncated:
+                self._reset(number)
+        return self.obs, self.rewards, self.terminated, self.truncated
+
+    def close(self):
+        """Nothing to release in this process."""
+
+    def _reset(self, number):
+        """Start the next game in one environment."""
+        self.envs[number].reset(self.seed + number +
+                                self.games[number] * self.stride)
+        self.games[number] += 1
+
+
+def _worker(connection, memory_name, shape, dtype, first, count, seed,
+            settings, kwargs):
+    """Run a slice of environments in a worker process."""
+    memory = shared_memory.SharedMemory(name=memory_name)
+    batch = np.ndarray(shape, dtype, buffer=memory.buf)
+    envs = VecBlasterEnv(count, settings, out=batch[first:first + count],
+                         seed=seed + first, stride=shape[0], **kwargs)
+    try:
+        while True:
+            command, actions = connection.recv()
+            if command == "step":
+                obs, rewards, terminated, truncated = envs.step(actions)
+                connection.send((rewards, terminated, truncated))
+            elif command == "reset":
+                envs.reset()
+                connection.send(None)
+            else:
+                break
+    finally:
+        del envs, batch
+        memory.close()
+        connection.close()
+
+
+class SubprocVecEnv:
+    """N environments spread over worker processes.
+
+    The observations are one array in shared memory that every worker
+    writes its slice of, so only actions and rewards go through the pipes.
+    """
+
+    def __init__(self, num_envs, workers=None, settings=None, seed=0,
+                 **kwargs):
+        """Start the workers; kwargs go to BlasterEnv."""
+        settings = settings if settings else Settings()
+        probe = BlasterEnv(copy.deepcopy(settings), **kwargs)
+        shape = (num_envs,) + probe.buffer_shape
+        dtype = np.dtype(probe.observation_dtype)
+        self.memory = shared_memory.SharedMemory(
+            create=True, size=max(1, int(np.prod(shape)) * dtype.itemsize))
+        self.buffer = np.ndarray(shape, dtype, buffer=self.memory.buf)
+        self.obs = self.buffer[..., :probe.observation_shape[-1]]
+        self.num_envs = num_envs
+
+        workers = min(workers or os.cpu_count(), num_envs)
+        self.slices = []
+        self.connections = []
+        self.processes = []
+        for number in range(workers):
+            first = num_envs * number // workers
+            count = num_envs * (number + 1) // workers - first
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=_worker, daemon=True,
+                args=(child, self.memory.name, shape, dtype, first, count,
+                      seed, settings, kwargs))
+            process.start()
+            child.close()
+            self.slices.append(slice(first, first + count))
+            self.connections.append(parent)
+            self.processes.append(process)
+
+        self.rewards = np.zeros(num_envs, dtype=np.float32)
+        self.terminated = np.zeros(num_envs, dtype=bool)
+        self.truncated = np.zeros(num_envs, dtype=bool)
+
+    def reset(self):
+        """Start a game in every environment; return the observations."""
+        for connection in self.connections:
+            connection.send(("reset", None))
+        for connection in self.connections:
+            connection.recv()
+        return self.obs
+
+    def step(self, actions):
+        """Step every environment by one tick, in parallel.
+
+        Return (observations, rewards, terminated, truncated) as arrays
+        that are reused from call to call.
+        """
+        actions = np.asarray(actions)
+        for connection, part in zip(self.connections, self.slices):
+            connection.send(("step", actions[part]))
+        for connection, part in zip(self.connections, self.slices):
+            (self.rewards[part], self.terminated[part],
+             self.truncated[part]) = connection.recv()
+        return self.obs, self.rewards, self.terminated, self.truncated
+
+    def close(self):
+        """Stop the workers and free the shared memory."""
+        for connection in self.connections:
+            connection.send(("close", None))
+            connection.close()
+        for process in self.processes:
+            process.join()
+        del self.obs, self.buffer
+        self.memory.close()
+        self.memory.unlink()
+
+
+def main(argv=None):
+    """Step random actions through a vectorized env and report the rate."""
+    parser = argparse.ArgumentParser(description="Measure env-steps/s.")
+    parser.add_argument("--envs", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="0 steps every env in this process")
+    parser.add_argument("--obs", choices=("state", "pixels"),
+                        default="state")
+    parser.add_argument("--pixel-size", type=int, nargs=2,
+                        metavar=("WIDTH", "HEIGHT"))
+    parser.add_argument("--steps", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    kwargs = {"obs_type": args.obs, "pixel_size": args.pixel_size}
+    if args.workers:
+        envs = SubprocVecEnv(args.envs, args.workers, **kwargs)
+    else:
+        envs = VecBlasterEnv(args.envs, **kwargs)
+    rng = np.random.default_rng(0)
+    actions = rng.integers(len(ACTIONS), size=(args.steps, args.envs))
+    envs.reset()
+
+    start = perf_counter()
+    for row in actions:
+        envs.step(row)
+    elapsed = perf_counter() - start
+    envs.close()
+    print(f"{args.envs} envs, {args.workers} workers, {args.obs}: "
+          f"{args.envs * args.steps / elapsed:.0f} env-steps/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+import numpy as np
+import pygame
+
+from alien import Alien
+
+
+class Fleet:
+    """A fleet of aliens whose positions are kept in NumPy arrays.
+
+    Element i of `x`, `y` and `alive` belongs to `sprites[i]`. The whole
+    fleet moves in a few array operations per tick; the sprites' rects are
+    only brought up to date by `sync_rects()`, when something needs them.
+
+    The slots of dead aliens, and their sprites, are taken by the next
+    ones to spawn, so the arrays only grow to the most aliens ever alive.
+    """
+
+    def __init__(self, hg_game):
+        """Initialize an empty fleet."""
+        self.settings = hg_game.settings
+        self.hg_game = hg_game
+
+        # Every alien has the same size.
+        self.width, self.height = Alien(hg_game).rect.size
+
+        self.sprites = []
+        self.x = np.zeros(0)
+        self.y = np.zeros(0)
+        self.alive = np.zeros(0, dtype=bool)
+        self.alive_count = 0
+        # Bumped whenever the aliens move or die, so indexes know to rebuild.
+        self.version = 0
+        # How far the fleet has moved since it was emptied.
+        self.shift_x = 0.0
+        self.shift_y = 0.0
+
+        # The living aliens, for drawing.
+        self.group = pygame.sprite.Group()
+
+    def __len__(self):
+        """Return the number of living aliens."""
+        return self.alive_count
+
+    def build(self, positions):
+        """Replace the fleet with new aliens at the given (x, y) positions."""
+        self.empty()
+        self.spawn(positions)
+
+    def spawn(self, positions):
+        """Add aliens at the given (x, y) positions, in free slots first."""
+        positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+        free = np.flatnonzero(~self.alive)[:len(positions)]
+        grow = len(positions) - len(free)
+        if grow:
+            first = len(self.sprites)
+            self.x = np.concatenate((self.x, np.zeros(grow)))
+            self.y = np.concatenate((self.y, np.zeros(grow)))
+            self.alive = np.concatenate((self.alive, np.zeros(grow, bool)))
+            for index in range(first, first + grow):
+                alien = Alien(self.hg_game)
+                alien.index = index
+                self.sprites.append(alien)
+            free = np.concatenate((free, np.arange(first, first + grow)))
+
+        self.x[free] = positions[:, 0]
+        self.y[free] = positions[:, 1]
+        self.alive[free] = True
+        self.alive_count += len(free)
+        self.version += 1
+        sprites = self.sprites
+        self.group.add([sprites[index] for index in free.tolist()])
+        self.sync_rects()
+
+    def empty(self):
+        """Remove every alien, keeping their slots for the next ones."""
+        self.group.empty()
+        self.alive[:] = False
+        self.alive_count = 0
+        self.shift_x = 0.0
+        self.shift_y = 0.0
+        self.version += 1
+
+    def restore(self, x, y, alive, shift_x, shift_y):
+        """Put back positions copied from this fleet's arrays earlier."""
+        count = len(x)
+        if count > len(self.sprites):
+            # Slots spawned since were let go of; take them back.
+            self.spawn(np.zeros((count - len(self.sprites), 2)))
+        group, sprites = self.group, self.sprites
+        was_alive = self.alive
+        # Only the aliens that died or came back change groups.
+        for index in np.flatnonzero(was_alive[:count] != alive).tolist():
+            if alive[index]:
+                group.add(sprites[index])
+            else:
+                group.remove(sprites[index])
+        for index in np.flatnonzero(was_alive[count:]).tolist():
+            group.remove(sprites[count + index])
+        self.x[:count] = x
+        self.y[:count] = y
+        was_alive[:count] = alive
+        was_alive[count:] = False
+        self.alive_count = int(np.count_nonzero(alive))
+        self.shift_x = shift_x
+        self.shift_y = shift_y
+        self.version += 1
+
+    def kill(self, index):
+        """Remove the alien at the given index from the fleet."""
+        if self.alive[index]:
+            self.alive[index] = False
+            self.alive_count -= 1
+            self.group.remove(self.sprites[index])
+            self.version += 1
+
+    def update(self):
+        """Forward the fleet at an edge, then move it up or down."""
+        if not self.alive_count:
+            return
+        alive = self.alive
+        # Rects hold whole pixels, so the edges are judged on rounded values.
+        top = np.rint(self.y[alive])
+        screen_height = self.hg_game.screen.get_height()
+        if (top.max() + self.height >= screen_height) or (top.min() <= 0):
+            self.x[alive] = np.rint(
+                self.x[alive] - self.settings.fleet_forward_speed)
+            self.shift_x -= self.settings.fleet_forward_speed
+            self.settings.fleet_direction *= -1
+
+        step = self.settings.alien_speed * self.settings.fleet_direction
+        self.y[alive] += step
+        self.shift_y += step
+        self.version += 1
+
+    def reached_left_edge(self):
+        """Return True if any alien has reached the left edge."""
+        return bool(self.alive_count) and self.x[self.alive].min() <= 0
+
+    def sync_rects(self):
+        """Copy the positions of the living aliens into their rects."""
+        indices = np.flatnonzero(self.alive)
+        xs = self.x[indices].astype(int).tolist()
+        ys = np.rint(self.y[indices]).astype(int).tolist()
+        sprites = self.sprites
+        for index, x, y in zip(indices.tolist(), xs, ys):
+            rect = sprites[index].rect
+            rect.x = x
+            rect.y = y
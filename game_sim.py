@@ -0,0 +1,435 @@
+import hashlib
+import random
+from operator import attrgetter
+
+import numpy as np
+import pygame
+
+from settings import Settings
+from game_stats import Gamestats
+from plane import Plane
+from bullet import Bullet
+from fleet import Fleet
+from collision import FleetGrid
+from waves import WaveStream
+from pool import Pool
+from profiler import PLANE, BULLETS, COLLISIONS, EXPLOSIONS, ALIENS
+from explosion import Explosion
+
+# The states of the game. DYING and LEVEL_CLEAR play out the explosions,
+# wait a moment, and then move on by themselves.
+MENU = "menu"
+PLAYING = "playing"
+DYING = "dying"
+LEVEL_CLEAR = "level_clear"
+
+# What a snapshot keeps of the statistics and of the settings; everything
+# else in them stays the same for a whole session.
+STATS_FIELDS = ("score", "level", "plane_left", "high_score", "shots_fired",
+                "aliens_hit")
+SETTINGS_FIELDS = ("bullet_speed", "alien_speed", "fleet_forward_speed",
+                   "plane_speed", "fleet_direction", "alien_points")
+_get_stats = attrgetter(*STATS_FIELDS)
+_get_settings = attrgetter(*SETTINGS_FIELDS)
+
+
+class Inputs:
+    """The player's input for a single tick of the simulation."""
+
+    def __init__(self, moving_up=False, moving_down=False, fire=0,
+                 pause=False, start=None):
+        """Initialize the input state."""
+        # Held keys.
+        self.moving_up = moving_up
+        self.moving_down = moving_down
+        # One-off actions: number of shots, the pause toggle and the
+        # difficulty chosen on the menu.
+        self.fire = fire
+        self.pause = pause
+        self.start = start
+
+    def clear_actions(self):
+        """Forget the one-off actions once they've been consumed."""
+        self.fire = 0
+        self.pause = False
+        self.start = None
+
+
+class Snapshot:
+    """A GameSim's state at the end of a tick; see GameSim.snapshot().
+
+    Taking another snapshot into the same object reuses its arrays, so
+    a rollback buffer of them allocates next to nothing once filled.
+    """
+
+    def __init__(self):
+        """Initialize an empty snapshot."""
+        self.ticks = 0
+        self.fleet_x = np.zeros(0)
+        self.fleet_y = np.zeros(0)
+        self.fleet_alive = np.zeros(0, dtype=bool)
+        # (x, rect x, rect y) of each bullet in the air, oldest first.
+        self.bullets = []
+        # (frames, current frame, frame counter, done, rect) of each
+        # explosion.
+        self.explosions = []
+
+
+class GameSim:
+    """The game's rules and entities, advanced one tick at a time.
+
+    The simulation needs neither a window nor audio. Whatever happened
+    during a tick is listed in `events` so a front end can play sounds and
+    redraw the scoreboard. Pauses are counted in ticks, never waited out,
+    so a headless run goes through them as fast as any other tick.
+    """
+
+    def __init__(self, settings=None, screen=None, seed=None):
+        """Initialize the simulation on a playfield of the settings' size."""
+        self.settings = settings if settings else Settings()
+        self.stats = Gamestats(self)
+
+        # Anything random in the rules must come from here, so that a run
+        # can be replayed from its seed.
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.rng = random.Random(self.seed)
+
+        # The sprites only need the playfield for its size, so a plain
+        # surface will do when there is no window.
+        if screen is None:
+            screen = pygame.Surface(
+                (self.settings.screen_width, self.settings.screen_height))
+        self.screen = screen
+
+        self.plane = Plane(self)
+        # Bullets and explosions are reused rather than created per shot.
+        self.bullets = Pool(lambda: Bullet(self))
+        self.fleet = Fleet(self)
+        # The living aliens, as sprites for drawing.
+        self.aliens = self.fleet.group
+        self.fleet_grid = FleetGrid(
+            self.fleet, masks=self.settings.collision_mode == "mask")
+        self.explosions = Pool(lambda: Explosion((0, 0), self))
+        # Lets each level's waves into the fleet as it makes room.
+        self.waves = WaveStream(self)
+        self._create_fleet()
+
+        self.state = MENU
+        # The difficulty of the game being played.
+        self.difficulty = None
+        # Ticks left to wait once a sequence's explosions have finished.
+        self.state_timer = 0
+        self.ticks = 0
+        self.events = []
+
+        # A FrameProfiler to charge each phase of a tick to, if any.
+        self.profiler = None
+
+    @property
+    def game_active(self):
+        """Whether a game is being played rather than the menu shown."""
+        return self.state != MENU
+
+    @property
+    def idle(self):
+        """Whether nothing on the screen is moving.
+
+        That's on the menu, and in a sequence once its explosions are over
+        and it's waiting to move on.
+        """
+        if self.state == MENU:
+            return True
+        return self.state in (DYING, LEVEL_CLEAR) and not self.explosions
+
+    @property
+    def allocations(self):
+        """How many bullets and explosions have been created so far."""
+        return self.bullets.allocations + self.explosions.allocations
+
+    def refresh_images(self):
+        """Give every sprite, in play or pooled, the newly converted images."""
+        self.plane.refresh_image()
+        for sprite in (self.fleet.sprites + self.bullets.items() +
+                       self.explosions.items()):
+            sprite.refresh_image()
+
+    def step(self, inputs):
+        """Advance the game by one tick."""
+        self.ticks += 1
+        if inputs.start is not None:
+            self.start_game(inputs.start)
+        if inputs.pause:
+            # The menu can't be brought up in the middle of a sequence.
+            if self.state == PLAYING:
+                self.state = MENU
+            elif self.state == MENU:
+                self.state = PLAYING
+
+        self.plane.moving_up = inputs.moving_up
+        self.plane.moving_down = inputs.moving_down
+        if self.state == PLAYING:
+            for shot in range(inputs.fire):
+                self._fire_bullet()
+            self.plane.update()
+            if self.profiler:
+                self.profiler.mark(PLANE)
+            self._update_bullets()
+            self._update_aliens()
+            if self.profiler:
+                self.profiler.mark(ALIENS)
+        elif self.state in (DYING, LEVEL_CLEAR):
+            self._update_sequence()
+        inputs.clear_actions()
+
+    def start_game(self, difficulty="EASY"):
+        """Start a new game at the given difficulty."""
+        # Reset the game settings and statistics.
+        self.settings.initialize_dynamic_settings()
+        self.stats.reset_stats()
+        self.state = PLAYING
+        self.difficulty = difficulty
+
+        # Get rid of any remaining bullets and aliens.
+        self.bullets.release_all()
+        self.fleet.empty()
+
+        # Create a new fleet and center the plane.
+        self._create_fleet()
+        self.plane.center_plane()
+
+        for each in range(self.settings.difficulty_speedups[difficulty]):
+            self.settings.increase_speed()
+        self.events.append("start")
+
+    def state_hash(self):
+        """Return a digest of everything that decides how the game goes on."""
+        digest = hashlib.blake2b(digest_size=16)
+        stats, settings = self.stats, self.settings
+        digest.update(repr((
+            self.ticks, self.state, self.state_timer,
+            stats.score, stats.level, stats.plane_left,
+            settings.bullet_speed, settings.alien_speed,
+            settings.fleet_forward_speed, settings.plane_speed,
+            settings.fleet_direction, settings.alien_points,
+            self.plane.y, self.plane.rect.topleft,
+            self.waves.spawned, self.waves.cursor,
+            self.fleet.shift_x, self.fleet.shift_y,
+            [(bullet.x, bullet.rect.y) for bullet in self.bullets],
+            [(explosion.rect.center, explosion.current_frame)
+             for explosion in self.explosions],
+        )).encode())
+        digest.update(self.fleet.x.tobytes())
+        digest.update(self.fleet.y.tobytes())
+        digest.update(self.fleet.alive.tobytes())
+        return digest.hexdigest()
+
+    def snapshot(self, snapshot=None):
+        """Copy the state into a Snapshot, reusing the given one if any."""
+        snap = snapshot if snapshot is not None else Snapshot()
+        snap.ticks = self.ticks
+        snap.state = self.state
+        snap.state_timer = self.state_timer
+        snap.difficulty = self.difficulty
+        snap.rng = self.rng.getstate()
+        snap.stats = _get_stats(self.stats)
+        snap.settings = _get_settings(self.settings)
+        plane = self.plane
+        snap.plane = (plane.y, plane.rect.y, plane.moving_up,
+                      plane.moving_down)
+        snap.bullets[:] = [(bullet.x, bullet.rect.x, bullet.rect.y)
+                           for bullet in self.bullets]
+        snap.explosions[:] = [
+            (explosion.frames, explosion.current_frame,
+             explosion.frame_counter, explosion.done, tuple(explosion.rect))
+            for explosion in self.explosions]
+
+        fleet = self.fleet
+        if len(snap.fleet_x) != len(fleet.x):
+            snap.fleet_x = np.empty_like(fleet.x)
+            snap.fleet_y = np.empty_like(fleet.y)
+            snap.fleet_alive = np.empty_like(fleet.alive)
+        np.copyto(snap.fleet_x, fleet.x)
+        np.copyto(snap.fleet_y, fleet.y)
+        np.copyto(snap.fleet_alive, fleet.alive)
+        snap.fleet_shift = (fleet.shift_x, fleet.shift_y)
+        waves = self.waves
+        snap.waves = (waves.level, waves.spawned, waves.cursor)
+        return snap
+
+    def restore(self, snap):
+        """Put the state back as it was when the snapshot was taken."""
+        self.ticks = snap.ticks
+        self.state = snap.state
+        self.state_timer = snap.state_timer
+        self.difficulty = snap.difficulty
+        self.rng.setstate(snap.rng)
+        for name, value in zip(STATS_FIELDS, snap.stats):
+            setattr(self.stats, name, value)
+        for name, value in zip(SETTINGS_FIELDS, snap.settings):
+            setattr(self.settings, name, value)
+        plane = self.plane
+        plane.y, plane.rect.y, plane.moving_up, plane.moving_down = snap.plane
+
+        bullets = self.bullets
+        bullets.release_all()
+        for x, rect_x, rect_y in snap.bullets:
+            bullet = bullets.acquire()
+            bullet.x = x
+            bullet.rect.x = rect_x
+            bullet.rect.y = rect_y
+        explosions = self.explosions
+        explosions.release_all()
+        for frames, current, counter, done, rect in snap.explosions:
+            explosion = explosions.acquire()
+            explosion.frames = frames
+            explosion.current_frame = current
+            explosion.frame_counter = counter
+            explosion.done = done
+            explosion.image = frames[min(current, len(frames) - 1)]
+            explosion.rect.update(rect)
+
+        self.fleet.restore(snap.fleet_x, snap.fleet_y, snap.fleet_alive,
+                           *snap.fleet_shift)
+        self.waves.seek(*snap.waves)
+
+    def resize(self, screen):
+        """Use a different playfield surface of the same size."""
+        self.screen = screen
+
+    def _fire_bullet(self):
+        """Create a new bullet and add it to the bullets group."""
+        if len(self.bullets) < self.settings.bullet_allowed:
+            new_bullet = self.bullets.acquire()
+            new_bullet.reset(self.plane)
+            self.stats.shots_fired += 1
+            self.events.append("fire")
+
+    def _update_bullets(self):
+        """Update position of the bullets and get rid of old bullets."""
+        # Update bullet's positions.
+        for bullet in self.bullets:
+            bullet.update()
+        # Get rid of the bullets that have disappeared.
+        self.bullets.cull(self._off_screen)
+        if self.profiler:
+            self.profiler.mark(BULLETS)
+        self._check_bullet_alien_collisions()
+        if self.profiler:
+            self.profiler.mark(COLLISIONS)
+        self._update_explosions()
+        if self.profiler:
+            self.profiler.mark(EXPLOSIONS)
+
+    def _off_screen(self, bullet):
+        """Return True if the bullet has left the screen."""
+        return bullet.rect.left >= self.settings.screen_width
+
+    def _update_explosions(self):
+        """Animate the explosions and get rid of the finished ones."""
+        for explosion in self.explosions:
+            explosion.update()
+        self.explosions.cull(Explosion.is_done)
+
+    def _check_bullet_alien_collisions(self):
+        """Respond to bullet-alien collisions."""
+        # Check for any bullets that have hit the aliens.
+        # If so, get rid of the bullet and the alien.
+        collisions = self.fleet_grid.groupcollide(self.bullets, kill=True)
+        if collisions:
+            fleet = self.fleet
+            for bullet, aliens in collisions.items():
+                self.bullets.release(bullet)
+                for alien in aliens:
+                    # Calculate the exact collision point
+                    top = int(round(fleet.y[alien.index]))
+                    collision_point = (bullet.rect.centerx,
+                                       top + fleet.height // 2)
+                    explosion = self.explosions.acquire()
+                    explosion.reset(collision_point)
+                self.stats.score += self.settings.alien_points * len(aliens)
+                self.stats.aliens_hit += len(aliens)
+            self.events.append("hit")
+            if self.stats.score > self.stats.high_score:
+                self.stats.high_score = self.stats.score
+                self.events.append("high_score")
+
+        if not self.fleet and self.waves.exhausted:
+            self._begin_sequence(LEVEL_CLEAR)
+            self.events.append("level_clear")
+
+    def _begin_sequence(self, state):
+        """Freeze the game while the explosions play out."""
+        self.state = state
+        self.state_timer = round(self.settings.sequence_pause *
+                                 self.settings.tick_rate)
+
+    def _update_sequence(self):
+        """Animate the explosions, then wait, then finish the sequence."""
+        if self.explosions:
+            self._update_explosions()
+        elif self.state_timer > 0:
+            self.state_timer -= 1
+        elif self.state == LEVEL_CLEAR:
+            self._start_new_level()
+        else:
+            self._finish_plane_hit()
+
+    def _start_new_level(self):
+        """Reset the screen and start a new level after destroyed all aliens."""
+        # Destroy existing bullets and create new fleet.
+        self.bullets.release_all()
+        self._create_fleet()
+        self.settings.increase_speed()
+
+        # Increase level.
+        self.stats.level += 1
+        self.state = PLAYING
+        self.events.append("level")
+
+    def _update_aliens(self):
+        """Move the fleet, then check whether it got the plane."""
+        self.fleet.update()
+        self.waves.update()
+        if self.fleet_grid.collideany(self.plane):
+            self._plane_hit()
+
+        self._check_aliens_leftedge()
+
+    def _create_fleet(self):
+        """Start the level's fleet, with as many waves as fit at first."""
+        self.fleet.empty()
+        self.waves.start(self.stats.level)
+        self.waves.update()
+
+    def _plane_hit(self):
+        """Respond to the plane being hit by an alien."""
+        if self.state != PLAYING:
+            # Already hit this tick.
+            return
+        # Create an explosion at the center of the plane
+        explosion = self.explosions.acquire()
+        explosion.reset(self.plane.rect.center, scale=2)
+        self._begin_sequence(DYING)
+        self.events.append("plane_hit")
+
+    def _finish_plane_hit(self):
+        """Carry on with the next plane, or end the game."""
+        if self.stats.plane_left > 0:
+            # Decrement plane_left.
+            self.stats.plane_left -= 1
+            self.events.append("lives")
+            # Get rid of any remaining bullets and aliens.
+            self.fleet.empty()
+            self.bullets.release_all()
+            # Create a new fleet and center the plane.
+            self._create_fleet()
+            self.plane.center_plane()
+            self.state = PLAYING
+        else:
+            self.state = MENU
+            self.events.append("game_over")
+
+    def _check_aliens_leftedge(self):
+        """Treat an alien reaching the left edge like a hit on the plane."""
+        if self.fleet.reached_left_edge():
+            self._plane_hit()
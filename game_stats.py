@@ -1,5 +1,3 @@
-from pathlib import Path
-import pygame
 class Gamestats:
     """Store the changing statistics in the horizonal game"""
 
@@ -7,16 +5,15 @@ class Gamestats:
         """Initialization"""
         self.settings = hg_game.settings
         self.reset_stats()
-        # Read from highscore.txt, should never be reset.
-        path = Path("highscore.txt")
-        if not path.exists():
-            self.high_score = 0
-            path.write_text(str(self.high_score))
-        else:
-            self.high_score = int(path.read_text())
+        # Should never be reset. The game fills it in from its HighScores;
+        # a headless simulation leaves the disk alone.
+        self.high_score = 0
     
     def reset_stats(self):
         """Initialize statistics that can change during the game."""
         self.plane_left = self.settings.plane_limit
         self.score = 0
-        self.level = 1
\ No newline at end of file
+        self.level = 1
+        # For working out the hit rate.
+        self.shots_fired = 0
+        self.aliens_hit = 0
\ No newline at end of file
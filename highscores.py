@@ -0,0 +1,142 @@
+import json
+import os
+import queue
+import threading
+import time
+from bisect import insort
+from pathlib import Path
+
+
+class HighScores:
+    """Every finished run, kept in an append-only journal on disk.
+
+    The journal holds one JSON line per run: score, level, difficulty and
+    when it ended. Writing happens on a background thread fed by a queue,
+    so record() never waits for the disk; each line is flushed and synced
+    as it's written, so a crash loses at most the run in progress. A line
+    cut short by a crash or a corrupt file is skipped when loading, and
+    the journal is then rewritten before the next run goes in, so that
+    run isn't appended onto the end of the broken line.
+
+    Once the journal grows past compact_at lines it's rewritten with only
+    the best `keep` runs, into a temporary file that then replaces it.
+    The best runs are also kept sorted in memory to answer top().
+    """
+
+    def __init__(self, path="scores.journal", legacy_path="highscore.txt",
+                 keep=100, compact_at=1000):
+        """Load the journal and start the writer thread."""
+        self.path = Path(path)
+        self.keep = keep
+        self.compact_at = compact_at
+        # The best runs, lowest score first.
+        self.index = []
+        self.lines = 0
+        self.write_errors = 0
+        # Whether the journal has anything in it that didn't load.
+        self.damaged = False
+        self._load()
+        # Journal lines since the last compaction; a damaged journal is
+        # compacted at the first write.
+        self._written = 0 if self.damaged else self.lines
+        if not self.lines:
+            self._import_legacy(Path(legacy_path))
+        # The writer's own copy of the best runs, for compacting.
+        self._kept = list(self.index)
+
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._write, name="highscores",
+                                       daemon=True)
+        self.thread.start()
+
+    def best(self):
+        """Return the highest score ever recorded, or 0."""
+        return self.index[-1][0] if self.index else 0
+
+    def top(self, n=10):
+        """Return the n best runs as dicts, best first."""
+        return [record for score, number, record in self.index[:-n - 1:-1]]
+
+    def record(self, score, level, difficulty):
+        """Add a finished run; it's written to the journal in the background."""
+        record = {"score": score, "level": level, "difficulty": difficulty,
+                  "time": round(time.time(), 3)}
+        self._add(record)
+        self.queue.put(record)
+
+    def close(self, timeout=2.0):
+        """Write out whatever is queued and stop the writer thread."""
+        self.queue.put(None)
+        self.thread.join(timeout)
+
+    def _add(self, record):
+        """Put a run into the in-memory index."""
+        self.lines += 1
+        self._insert(self.index, (record["score"], self.lines, record))
+
+    def _insert(self, index, entry):
+        """Insert a (score, number, record) entry into a sorted index."""
+        # The number breaks ties, so records are never compared.
+        insort(index, entry)
+        if len(index) > self.keep:
+            del index[0]
+
+    def _load(self):
+        """Read the journal, skipping anything that doesn't parse."""
+        try:
+            text = self.path.read_text()
+        except (OSError, UnicodeDecodeError):
+            return
+        if text and not text.endswith("\n"):
+            # The last line was cut short.
+            self.damaged = True
+        for line in text.splitlines():
+            try:
+                record = json.loads(line)
+                record["score"] = int(record["score"])
+            except (ValueError, TypeError, KeyError):
+                self.damaged = True
+                continue
+            self._add(record)
+
+    def _import_legacy(self, legacy_path):
+        """Start the journal off with the old highscore.txt, if it's sound."""
+        try:
+            score = int(legacy_path.read_text())
+        except (OSError, ValueError, UnicodeDecodeError):
+            return
+        self._add({"score": score, "level": None, "difficulty": None,
+                   "time": None})
+
+    def _write(self):
+        """Append queued records to the journal until told to stop."""
+        number = self.lines
+        while True:
+            record = self.queue.get()
+            if record is None:
+                break
+            number += 1
+            self._insert(self._kept, (record["score"], number, record))
+            try:
+                if self._written == 0 or self._written >= self.compact_at:
+                    # A new journal also takes in the imported score.
+                    self._compact()
+                else:
+                    with open(self.path, "a") as file:
+                        file.write(json.dumps(record) + "\n")
+                        file.flush()
+                        os.fsync(file.fileno())
+                    self._written += 1
+            except OSError:
+                self.write_errors += 1
+
+    def _compact(self):
+        """Rewrite the journal with only the best runs."""
+        temporary = self.path.with_name(self.path.name + ".tmp")
+        with open(temporary, "w") as file:
+            for score, number, record in self._kept:
+                file.write(json.dumps(record) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, self.path)
+        self._written = len(self._kept)
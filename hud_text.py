@@ -0,0 +1,80 @@
+import pygame
+import pygame.font
+
+# Fonts are looked up once per size and shared by everything that draws text.
+_fonts = {}
+
+
+def get_font(size=48):
+    """Return the game's font at the given size."""
+    font = _fonts.get(size)
+    if font is None:
+        font = pygame.font.SysFont(None, size)
+        _fonts[size] = font
+    return font
+
+
+class GlyphAtlas:
+    """Characters rendered (and rotated) once, then pieced together.
+
+    render() builds a string out of the cached glyphs in a single blits()
+    call, instead of rendering and rotating the whole string again.
+    The angle is 0, or -90 for text that reads from top to bottom.
+    """
+
+    def __init__(self, font, color, background=None, angle=0,
+                 preload="0123456789,"):
+        """Initialize the atlas and render the preloaded characters."""
+        self.font = font
+        self.color = color
+        self.background = background
+        self.angle = angle
+        self.vertical = angle == -90
+        # The glyphs never overlap, so on a clear surface taking the larger
+        # value copies them exactly, edges and all.
+        self.blend = pygame.BLEND_RGBA_MAX if background is None else 0
+        # The height of a line, or its width when vertical.
+        self.thickness = 0
+        self.glyphs = {}
+        for char in preload:
+            self.glyph(char)
+
+    def glyph(self, char):
+        """Return the image of one character, rendering it the first time."""
+        entry = self.glyphs.get(char)
+        if entry is None:
+            image = self.font.render(char, True, self.color, self.background)
+            if self.angle:
+                image = pygame.transform.rotate(image, self.angle)
+            width, height = image.get_size()
+            if self.vertical:
+                advance, thickness = height, width
+            else:
+                advance, thickness = width, height
+            # The advance is how far the next character moves along the line.
+            entry = (image, advance)
+            self.glyphs[char] = entry
+            self.thickness = max(self.thickness, thickness)
+        return entry
+
+    def render(self, text):
+        """Return an image of the text made from the cached glyphs."""
+        blits = []
+        position = 0
+        for char in text:
+            image, advance = self.glyph(char)
+            dest = (0, position) if self.vertical else (position, 0)
+            blits.append((image, dest, None, self.blend))
+            position += advance
+
+        if self.vertical:
+            size = (self.thickness, position)
+        else:
+            size = (position, self.thickness)
+        if self.background is None:
+            image = pygame.Surface(size, pygame.SRCALPHA)
+        else:
+            image = pygame.Surface(size)
+            image.fill(self.background)
+        image.blits(blits, False)
+        return image
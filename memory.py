@@ -0,0 +1,172 @@
+"""Keep garbage collection out of gameplay, and measure memory as it goes.
+
+Python's cyclic garbage collector runs whenever enough container objects
+have been allocated, wherever the game happens to be, and a collection of
+the older generations can take long enough to drop a frame. GCController
+holds it off while a game is being played and collects in the idle
+moments instead: on the menu and between levels or lives. MemoryMonitor
+measures what's left: how long each collection paused the game, what a
+sample of frames allocated, and how many objects of each entity type
+there are.
+"""
+import gc
+import tracemalloc
+from collections import Counter
+from time import perf_counter
+
+# How the collector is handled while playing: "default" leaves it alone,
+# "tuned" makes it run much less often, and "frozen" moves everything
+# alive at the start into a generation that's never collected and turns
+# the collector off, short of a young collection if garbage piles up.
+GC_MODES = ("default", "tuned", "frozen")
+# Collection thresholds for "tuned"; see gc.set_threshold().
+TUNED_THRESHOLDS = (20000, 50, 100)
+
+# The classes whose instances are counted.
+ENTITY_TYPES = ("Alien", "Bullet", "Explosion", "Button", "Group",
+                "Snapshot")
+# Per-frame memory numbers recorded by the profiler.
+MEMORY_COUNTS = ("gc_ms", "gc_collections", "alloc_blocks", "alloc_kb")
+
+
+class GCController:
+    """Hold the garbage collector off during play, collect when idle."""
+
+    def __init__(self, mode="frozen", young_limit=10000):
+        """Initialize; nothing changes until the first update().
+
+        In "frozen" mode a young collection still runs once this many
+        more container objects have been allocated than freed.
+        """
+        if mode not in GC_MODES:
+            raise ValueError(f"unknown gc mode {mode!r}")
+        self.mode = mode
+        self.young_limit = young_limit
+        self.playing = False
+        self.idle_collections = 0
+        self.young_collections = 0
+        self._thresholds = gc.get_threshold()
+
+    def update(self, playing):
+        """Follow the game in and out of play; call once per frame.
+
+        Return True if a full collection was run for going idle.
+        """
+        if playing == self.playing:
+            if (playing and self.mode == "frozen" and
+                    gc.get_count()[0] > self.young_limit):
+                # Only the objects allocated since the freeze are looked at.
+                gc.collect(0)
+                self.young_collections += 1
+            return False
+        self.playing = playing
+        if playing:
+            self._hold_off()
+            return False
+        self._let_go()
+        gc.collect()
+        self.idle_collections += 1
+        return True
+
+    def close(self):
+        """Give the collector back its usual settings."""
+        if self.playing:
+            self._let_go()
+            self.playing = False
+
+    def _hold_off(self):
+        """Start keeping the collector from running."""
+        if self.mode == "frozen":
+            # No collection here, as play is about to go on: whatever dead
+            # objects get frozen in are collected at the next idle moment.
+            gc.freeze()
+            gc.disable()
+        elif self.mode == "tuned":
+            self._thresholds = gc.get_threshold()
+            gc.set_threshold(*TUNED_THRESHOLDS)
+
+    def _let_go(self):
+        """Let the collector run as usual again."""
+        if self.mode == "frozen":
+            gc.unfreeze()
+            gc.enable()
+        elif self.mode == "tuned":
+            gc.set_threshold(*self._thresholds)
+
+
+class MemoryMonitor:
+    """Time garbage collections and sample allocations, frame by frame.
+
+    Every collection is timed through gc.callbacks. One frame in every
+    sample_every is traced with tracemalloc, which slows it down too much
+    to leave on; the blocks it allocated that were still alive at its end,
+    and the most memory it had allocated at once, stand for the frames in
+    between.
+    """
+
+    def __init__(self, sample_every=120):
+        """Initialize and start timing collections."""
+        self.sample_every = sample_every
+        self.frames = 0
+        # Collections and their pause so far this frame.
+        self.collections = 0
+        self.pause = 0.0
+        # The longest pause of any collection yet, in seconds.
+        self.max_pause = 0.0
+        self.total_collections = 0
+        # The last sampled frame's surviving blocks and peak kilobytes.
+        self.sample = (0, 0.0)
+        # Instances of each of ENTITY_TYPES, as of count_objects().
+        self.object_counts = {}
+        self._started = None
+        self._sampling = False
+        gc.callbacks.append(self._on_gc)
+
+    def start_frame(self):
+        """Begin a frame, tracing it if it's due for a sample."""
+        self.collections = 0
+        self.pause = 0.0
+        due = self.frames % self.sample_every == 0
+        if due and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._sampling = True
+
+    def end_frame(self):
+        """Finish the frame; return its values of MEMORY_COUNTS."""
+        self.frames += 1
+        if self._sampling:
+            current, peak = tracemalloc.get_traced_memory()
+            traces = tracemalloc.take_snapshot().statistics("filename")
+            tracemalloc.stop()
+            self._sampling = False
+            self.sample = (sum(stat.count for stat in traces), peak / 1024)
+        return (self.pause * 1000, self.collections) + self.sample
+
+    def count_objects(self):
+        """Count the instances of each entity type; slow, so call when idle."""
+        wanted = set(ENTITY_TYPES)
+        counts = Counter(name for name in
+                         (type(item).__name__ for item in gc.get_objects())
+                         if name in wanted)
+        self.object_counts = {name: counts[name] for name in ENTITY_TYPES}
+        return self.object_counts
+
+    def close(self):
+        """Stop timing collections."""
+        if self._on_gc in gc.callbacks:
+            gc.callbacks.remove(self._on_gc)
+        if self._sampling:
+            tracemalloc.stop()
+            self._sampling = False
+
+    def _on_gc(self, phase, info):
+        """Time a collection from its start to its stop."""
+        if phase == "start":
+            self._started = perf_counter()
+        elif self._started is not None:
+            pause = perf_counter() - self._started
+            self._started = None
+            self.pause += pause
+            self.collections += 1
+            self.total_collections += 1
+            self.max_pause = max(self.max_pause, pause)
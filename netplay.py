@@ -0,0 +1,303 @@
+"""Two players on one game over UDP, kept in step by rollback.
+
+Each player runs the whole simulation. A tick's input is sent to the
+other player input_delay ticks before it's needed, and every packet
+repeats the inputs the other side hasn't acknowledged yet, so a lost
+packet is made up for by the next one. When the other player's input for
+a tick hasn't arrived in time, their last known input is assumed; if it
+turns out to have been different, the game is rolled back to a snapshot
+from before that tick and played forward again. Neither side gets more
+than max_rollback ticks ahead of what it knows of the other.
+
+The game has one plane, so the players fly it together: either can steer
+and both can fire. To play both ends over loopback, with lag and lost
+packets, and check that they agree:
+
+    python netplay.py --latency 0.08 --jitter 0.03 --loss 0.1
+"""
+import argparse
+import heapq
+import json
+import random
+import socket
+import struct
+import sys
+from time import perf_counter
+
+from settings import Settings
+from game_sim import GameSim, Inputs, Snapshot
+from autopilot import RandomPolicy, ScriptedPolicy
+from replay import (UP, DOWN, FIRE_SHIFT, PAUSE, START_SHIFT, encode_inputs,
+                    decode_inputs)
+
+MAGIC = b"AN"
+# Magic, the first tick of the receiver's input the sender is missing,
+# and the tick of the first input carried and how many are carried.
+PACKET = struct.Struct("<2sIIB")
+MAX_INPUTS = 255
+
+
+def merge_coop(first, second):
+    """Combine both players' input bytes for the plane they share."""
+    code = (first | second) & (UP | DOWN | PAUSE)
+    fire = ((first >> FIRE_SHIFT) & 0x03) + ((second >> FIRE_SHIFT) & 0x03)
+    code |= min(fire, 3) << FIRE_SHIFT
+    start = (first >> START_SHIFT) or (second >> START_SHIFT)
+    return code | start << START_SHIFT
+
+
+class RollbackSession:
+    """One player's end of a game played with another over UDP."""
+
+    def __init__(self, sim, player, sock, peer, input_delay=2,
+                 max_rollback=8, merge=merge_coop):
+        """Initialize for a simulation both players have set up alike.
+
+        sock is a non-blocking UDP socket, or anything with its sendto()
+        and recvfrom(); peer is the other player's address. Player 0's
+        input comes first when the two are merged.
+        """
+        self.sim = sim
+        self.player = player
+        self.sock = sock
+        self.peer = peer
+        self.input_delay = input_delay
+        self.max_rollback = max_rollback
+        self.merge = merge
+        self.difficulties = list(sim.settings.difficulty_speedups)
+        self.inputs = Inputs()
+
+        # The next tick to play.
+        self.tick = 0
+        # Input bytes by tick: ours, and the other player's as far as they
+        # have arrived in order. No one has any input for the first ticks.
+        self.local = bytearray(input_delay)
+        self.remote = bytearray(input_delay)
+        # The other player's inputs that arrived ahead of a missing one.
+        self.early = {}
+        # What was assumed for the other player's ticks not yet known.
+        self.predicted = {}
+        # The first of our inputs the other player hasn't acknowledged.
+        self.unacked = 0
+        # The state before each recent tick, by tick modulo their number.
+        self.snapshots = [Snapshot() for slot in range(max_rollback + 1)]
+
+        self.rollbacks = 0
+        self.replayed_ticks = 0
+        self.stalls = 0
+
+    @property
+    def confirmed(self):
+        """How many ticks have both players' input known."""
+        return len(self.remote)
+
+    def advance(self, inputs):
+        """Play the next tick with our input; return False if we must wait.
+
+        The input given is for input_delay ticks from now.
+        """
+        self.poll()
+        if self.tick - len(self.remote) >= self.max_rollback:
+            # Too far ahead of the other player to roll back any further.
+            self.stalls += 1
+            self._send()
+            return False
+        self.local.append(encode_inputs(inputs, self.difficulties))
+        self._send()
+        self._play(self.tick)
+        self.tick += 1
+        return True
+
+    def wait(self):
+        """Exchange inputs without playing a tick."""
+        self.poll()
+        self._send()
+
+    def poll(self):
+        """Take in whatever the other player has sent; roll back if needed."""
+        mispredicted = None
+        while True:
+            try:
+                data, address = self.sock.recvfrom(PACKET.size + MAX_INPUTS)
+            except BlockingIOError:
+                break
+            if len(data) < PACKET.size:
+                continue
+            magic, ack, first, count = PACKET.unpack_from(data)
+            if magic != MAGIC or len(data) != PACKET.size + count:
+                continue
+            self.unacked = max(self.unacked, ack)
+            for tick in range(max(first, len(self.remote)), first + count):
+                self.early[tick] = data[PACKET.size + tick - first]
+
+            # Take in the inputs that follow on from those known.
+            while len(self.remote) in self.early:
+                tick = len(self.remote)
+                code = self.early.pop(tick)
+                self.remote.append(code)
+                predicted = self.predicted.pop(tick, code)
+                if predicted != code and mispredicted is None:
+                    mispredicted = tick
+        if mispredicted is not None:
+            self._roll_back(mispredicted)
+
+    def _play(self, tick):
+        """Save the state, then play a tick with the inputs as known."""
+        sim = self.sim
+        sim.snapshot(self.snapshots[tick % len(self.snapshots)])
+        if tick < len(self.remote):
+            remote = self.remote[tick]
+        else:
+            # Assume the other player carries on as they were.
+            remote = self.remote[-1] if self.remote else 0
+            self.predicted[tick] = remote
+        local = self.local[tick]
+        code = (self.merge(local, remote) if self.player == 0 else
+                self.merge(remote, local))
+        sim.step(decode_inputs(code, self.difficulties, self.inputs))
+
+    def _roll_back(self, tick):
+        """Go back to before a mispredicted tick and play on from there."""
+        sim = self.sim
+        events = len(sim.events)
+        sim.restore(self.snapshots[tick % len(self.snapshots)])
+        for replayed in range(tick, self.tick):
+            self._play(replayed)
+        # The front end has had these ticks' events already.
+        del sim.events[events:]
+        self.rollbacks += 1
+        self.replayed_ticks += self.tick - tick
+
+    def _send(self):
+        """Send the other player every input of ours they haven't got."""
+        first = self.unacked
+        codes = self.local[first:first + MAX_INPUTS]
+        header = PACKET.pack(MAGIC, len(self.remote), first, len(codes))
+        self.sock.sendto(header + codes, self.peer)
+
+
+class LossyLink:
+    """A UDP socket that delays, reorders and loses packets, for testing."""
+
+    def __init__(self, sock, latency=0.0, jitter=0.0, loss=0.0, rng=None,
+                 clock=perf_counter):
+        """Wrap a socket; latency and jitter are in seconds of clock()."""
+        self.sock = sock
+        self.latency = latency
+        self.jitter = jitter
+        self.loss = loss
+        self.rng = rng if rng else random.Random()
+        self.clock = clock
+        # (due, number, data, address) of the packets held back.
+        self.queue = []
+        self.sent = 0
+
+    def sendto(self, data, address):
+        """Send a packet once it's due, unless it gets lost."""
+        if self.rng.random() < self.loss:
+            return
+        due = self.clock() + self.latency + self.rng.uniform(0, self.jitter)
+        heapq.heappush(self.queue, (due, self.sent, data, address))
+        self.sent += 1
+
+    def recvfrom(self, size):
+        """Send what's due, then receive as the socket does."""
+        now = self.clock()
+        while self.queue and self.queue[0][0] <= now:
+            due, number, data, address = heapq.heappop(self.queue)
+            self.sock.sendto(data, address)
+        return self.sock.recvfrom(size)
+
+
+def play_loopback(ticks, latency=0.0, jitter=0.0, loss=0.0, input_delay=2,
+                  max_rollback=8, difficulty="EASY", seed=0):
+    """Play both ends of a session over loopback; return a report."""
+    settings = Settings()
+    tick_rate = settings.tick_rate
+    socks = []
+    for player in range(2):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind(("127.0.0.1", 0))
+        sock.setblocking(False)
+        socks.append(sock)
+    # Both ends play one tick per 1/tick_rate seconds of this clock.
+    frame = 0
+    clock = lambda: frame / tick_rate
+
+    sessions = []
+    for player in range(2):
+        sim = GameSim(Settings(), seed=seed)
+        sim.start_game(difficulty)
+        sim.events.clear()
+        link = LossyLink(socks[player], latency, jitter, loss,
+                         random.Random(seed + player), clock)
+        sessions.append(RollbackSession(sim, player, link,
+                                        socks[1 - player].getsockname(),
+                                        input_delay, max_rollback))
+    # One player chases aliens, the other fires and wanders at random.
+    policies = [ScriptedPolicy(), RandomPolicy(random.Random(seed), 0.2)]
+
+    times = []
+    while any(session.tick < ticks or session.confirmed < ticks
+              for session in sessions):
+        frame += 1
+        if frame > 10 * ticks + 10 * tick_rate:
+            break
+        for session, policy in zip(sessions, policies):
+            if session.tick < ticks:
+                inputs = Inputs()
+                policy.act(session.sim, inputs)
+                start = perf_counter()
+                session.advance(inputs)
+                times.append(perf_counter() - start)
+            else:
+                session.wait()
+            session.sim.events.clear()
+    for sock in socks:
+        sock.close()
+
+    times.sort()
+    hashes = [session.sim.state_hash() for session in sessions]
+    return {
+        "ticks": ticks,
+        "frames": frame,
+        "latency_ms": round(latency * 1000),
+        "jitter_ms": round(jitter * 1000),
+        "loss": loss,
+        "rollbacks": [session.rollbacks for session in sessions],
+        "replayed_ticks": [session.replayed_ticks for session in sessions],
+        "stalls": [session.stalls for session in sessions],
+        "p50_advance_ms": round(times[len(times) // 2] * 1000, 4),
+        "p99_advance_ms": round(times[int(len(times) * 0.99)] * 1000, 4),
+        "max_advance_ms": round(times[-1] * 1000, 4),
+        "score": [session.sim.stats.score for session in sessions],
+        "in_sync": hashes[0] == hashes[1] and all(
+            session.tick == ticks for session in sessions),
+    }
+
+
+def main(argv=None):
+    """Play a session over loopback and print how it went as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ticks", type=int, default=3600)
+    parser.add_argument("--latency", type=float, default=0.05,
+                        help="one-way delay in seconds")
+    parser.add_argument("--jitter", type=float, default=0.02,
+                        help="extra random delay in seconds, reordering")
+    parser.add_argument("--loss", type=float, default=0.05,
+                        help="fraction of packets lost")
+    parser.add_argument("--input-delay", type=int, default=2)
+    parser.add_argument("--max-rollback", type=int, default=8)
+    parser.add_argument("--difficulty", default="EASY")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    report = play_loopback(args.ticks, args.latency, args.jitter, args.loss,
+                           args.input_delay, args.max_rollback,
+                           args.difficulty, args.seed)
+    print(json.dumps(report, indent=2))
+    return 0 if report["in_sync"] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,6 +1,7 @@
-import pygame
 from pygame.sprite import Sprite
 
+from assets import assets
+
 class Plane(Sprite):
     """A class to manage the plance"""
 
@@ -9,8 +10,10 @@ class Plane(Sprite):
         super().__init__()
         self.screen = h_game.screen
         self.screen_rect = h_game.screen.get_rect()
-        self.image = pygame.image.load("images/plane.png")
+        self.image = assets.image("plane")
         self.rect = self.image.get_rect()
+        # From the shared mask cache, for pixel-accurate collisions.
+        self.mask = assets.mask("plane")
         self.rect.midleft = self.screen_rect.midleft
         self.rect.x += 16 # make the plane moving to right a little.
         self.moving_up = False
@@ -30,9 +33,9 @@ class Plane(Sprite):
         
         self.rect.y = self.y
     
-    def blitme(self):
-        """Draw the plane at its current location."""
-        self.screen.blit(self.image, self.rect)
+    def refresh_image(self):
+        """Take the image again, once it's been converted for a new display."""
+        self.image = assets.image("plane")
 
     def center_plane(self):
         """make the plane back to initial place"""
@@ -0,0 +1,60 @@
+class Pool:
+    """A set of reusable objects, handed out by acquire() and put back by
+    release().
+
+    The objects in use are kept in `active`, in the order they were
+    acquired. Released objects wait in a free list for the next acquire(),
+    so once the pool has grown to its working size nothing new is created.
+    `allocations` counts how many objects the pool has ever had to create.
+    """
+
+    def __init__(self, factory):
+        """Initialize an empty pool that makes objects with factory()."""
+        self.factory = factory
+        self.active = []
+        self.free = []
+        self.allocations = 0
+
+    def __len__(self):
+        """Return the number of objects in use."""
+        return len(self.active)
+
+    def __iter__(self):
+        """Iterate over the objects in use, oldest first."""
+        return iter(self.active)
+
+    def items(self):
+        """Return every object the pool has made, in use or free."""
+        return self.active + self.free
+
+    def acquire(self):
+        """Return a free object, creating one only if there is none."""
+        if self.free:
+            item = self.free.pop()
+        else:
+            item = self.factory()
+            self.allocations += 1
+        self.active.append(item)
+        return item
+
+    def release(self, item):
+        """Put an object in use back into the pool."""
+        self.active.remove(item)
+        self.free.append(item)
+
+    def release_all(self):
+        """Put every object in use back into the pool."""
+        self.free.extend(self.active)
+        self.active.clear()
+
+    def cull(self, is_done):
+        """Release, in place, every object for which is_done(item) is true."""
+        active = self.active
+        kept = 0
+        for item in active:
+            if is_done(item):
+                self.free.append(item)
+            else:
+                active[kept] = item
+                kept += 1
+        del active[kept:]
@@ -0,0 +1,188 @@
+import json
+from time import perf_counter
+
+import numpy as np
+import pygame
+
+from hud_text import get_font
+from memory import MEMORY_COUNTS
+
+# The phases of a frame, in the order they run.
+PHASES = ("events", "plane", "bullets", "collisions", "explosions",
+          "aliens", "draw", "flip")
+EVENTS, PLANE, BULLETS, COLLISIONS, EXPLOSIONS, ALIENS, DRAW, FLIP = range(
+    len(PHASES))
+
+# Entity counts recorded with every frame.
+COUNTS = ("alien_count", "bullet_count", "explosion_count")
+
+
+class FrameProfiler:
+    """Time each phase of the last few hundred frames.
+
+    Code being profiled calls mark(phase) at the end of each phase, which
+    charges the time since the previous mark to that phase. Frames are
+    kept in a fixed-size ring buffer, so profiling never allocates as it
+    runs. Leave the profiler out entirely (None) to turn it off.
+
+    Given a MemoryMonitor, each frame also records its garbage collection
+    pauses and the monitor's latest allocation sample.
+    """
+
+    def __init__(self, size=600, memory=None):
+        """Initialize an empty ring buffer of the given number of frames."""
+        self.size = size
+        self.memory = memory
+        self.times = np.zeros((size, len(PHASES)))
+        self.counts = np.zeros((size, len(COUNTS)), dtype=np.int64)
+        self.memory_counts = np.zeros((size, len(MEMORY_COUNTS)))
+        self.frames = 0
+        # The frame being timed; it joins the buffer once it's finished.
+        self._current = np.zeros(len(PHASES))
+        self._last = perf_counter()
+
+    def start_frame(self):
+        """Begin timing a new frame."""
+        self._current[:] = 0.0
+        if self.memory:
+            self.memory.start_frame()
+        self._last = perf_counter()
+
+    def mark(self, phase):
+        """Charge the time since the last mark to the given phase."""
+        now = perf_counter()
+        self._current[phase] += now - self._last
+        self._last = now
+
+    def end_frame(self, aliens, bullets, explosions):
+        """Finish the frame, recording how many entities there were."""
+        row = self.frames % self.size
+        self.times[row] = self._current
+        counts = self.counts[row]
+        counts[0] = aliens
+        counts[1] = bullets
+        counts[2] = explosions
+        if self.memory:
+            self.memory_counts[row] = self.memory.end_frame()
+        self.frames += 1
+
+    def history(self):
+        """Return (times, counts) of the recorded frames, oldest first."""
+        times, counts, memory_counts = self._history()
+        return times, counts
+
+    def memory_history(self):
+        """Return the MEMORY_COUNTS of the recorded frames, oldest first."""
+        return self._history()[2]
+
+    def _history(self):
+        """Return every array of the recorded frames, oldest first."""
+        if self.frames <= self.size:
+            return (self.times[:self.frames], self.counts[:self.frames],
+                    self.memory_counts[:self.frames])
+        order = np.roll(np.arange(self.size), -(self.frames % self.size))
+        return self.times[order], self.counts[order], self.memory_counts[order]
+
+    def averages(self, frames=60):
+        """Return the mean milliseconds per phase over the last frames."""
+        times, counts = self.history()
+        if not len(times):
+            return dict.fromkeys(PHASES, 0.0)
+        means = times[-frames:].mean(axis=0) * 1000
+        return dict(zip(PHASES, means.tolist()))
+
+    def dump(self, path):
+        """Write the recorded frames to a .json or .csv file."""
+        times, counts, memory_counts = self._history()
+        first = self.frames - len(times)
+        # The memory columns only mean something with a monitor.
+        memory_names = MEMORY_COUNTS if self.memory else ()
+        if path.endswith(".json"):
+            frames = []
+            for offset, (row, count, memory) in enumerate(
+                    zip(times, counts, memory_counts)):
+                frame = {"frame": first + offset}
+                frame.update(zip(PHASES, (row * 1000).round(4).tolist()))
+                frame.update(zip(COUNTS, count.tolist()))
+                frame.update(zip(memory_names, memory.round(4).tolist()))
+                frames.append(frame)
+            with open(path, "w") as file:
+                json.dump({"unit": "ms", "frames": frames}, file, indent=1)
+        else:
+            with open(path, "w") as file:
+                file.write(",".join(("frame",) + PHASES + COUNTS +
+                                    memory_names) + "\n")
+                for offset, (row, count, memory) in enumerate(
+                        zip(times, counts, memory_counts)):
+                    values = [str(first + offset)]
+                    values.extend(f"{ms:.4f}" for ms in row * 1000)
+                    values.extend(str(value) for value in count)
+                    if memory_names:
+                        values.extend(f"{value:g}" for value in memory)
+                    file.write(",".join(values) + "\n")
+
+
+class ProfilerOverlay:
+    """Show the profiler's rolling averages in a corner of the screen."""
+
+    def __init__(self, profiler, refresh=30):
+        """Initialize the overlay; the text is redrawn every refresh frames."""
+        self.profiler = profiler
+        self.refresh = refresh
+        self.font = get_font(22)
+        self.visible = False
+        self.image = None
+        self.rect = None
+        self._drawn_at = None
+
+    def toggle(self):
+        """Show or hide the overlay."""
+        self.visible = not self.visible
+        self._drawn_at = None
+
+    def item(self):
+        """Return the overlay as an (image, rect) pair, brought up to date."""
+        frames = self.profiler.frames
+        if self._drawn_at is None or frames - self._drawn_at >= self.refresh:
+            self._render()
+            self._drawn_at = frames
+        return self.image, self.rect
+
+    def _render(self):
+        """Draw the averages, entity counts and memory into one image."""
+        averages = self.profiler.averages()
+        rows = [("frame ms", f"{sum(averages.values()):.2f}")]
+        rows.extend((phase, f"{ms:.3f}") for phase, ms in averages.items())
+        times, counts = self.profiler.history()
+        if len(counts):
+            rows.extend((name, str(value))
+                        for name, value in zip(COUNTS, counts[-1].tolist()))
+        memory = self.profiler.memory
+        if memory:
+            recent = self.profiler.memory_history()[-60:]
+            if len(recent):
+                rows.append(("gc max ms", f"{recent[:, 0].max():.3f}"))
+                rows.append(("gc runs", str(int(recent[:, 1].sum()))))
+            blocks, kilobytes = memory.sample
+            rows.append(("alloc blocks", str(blocks)))
+            rows.append(("alloc peak kb", f"{kilobytes:.1f}"))
+            rows.extend((name, str(count))
+                        for name, count in memory.object_counts.items())
+
+        # Names on the left, numbers lined up on the right.
+        color = (255, 255, 255)
+        rendered = [(self.font.render(name, True, color),
+                     self.font.render(value, True, color))
+                    for name, value in rows]
+        name_width = max(name.get_width() for name, value in rendered)
+        value_width = max(value.get_width() for name, value in rendered)
+        height = self.font.get_linesize()
+        self.image = pygame.Surface((name_width + value_width + 24,
+                                     height * len(rendered) + 12))
+        self.image.fill((20, 20, 20))
+        for number, (name, value) in enumerate(rendered):
+            y = 6 + number * height
+            self.image.blit(name, (6, y))
+            self.image.blit(value, (self.image.get_width() - 6 -
+                                    value.get_width(), y))
+        self.rect = self.image.get_rect(topleft=(10, 10))
@@ -0,0 +1,167 @@
+import pygame
+
+# The layers of a frame, drawn back to front.
+LAYERS = ("bullets", "plane", "aliens", "explosions", "hud", "menu",
+          "overlay")
+(BULLET_LAYER, PLANE_LAYER, ALIEN_LAYER, EXPLOSION_LAYER, HUD_LAYER,
+ MENU_LAYER, OVERLAY_LAYER) = range(len(LAYERS))
+
+
+def blit_all(screen, items):
+    """Blit a list of (image, rect) pairs in one call."""
+    screen.blits(items, False)
+
+
+if hasattr(pygame.Surface, "fblits"):
+    # pygame-ce's fblits() doesn't even build the list of rects.
+    def blit_all(screen, items):
+        """Blit a list of (image, rect) pairs in one call."""
+        screen.fblits(items)
+
+
+class RenderQueue:
+    """The (image, rect) pairs to draw this frame, layer by layer.
+
+    Each layer is submitted with a single blits() call, so drawing a big
+    fleet costs one call into pygame instead of one per alien. The queue
+    is meant to be cleared and refilled every frame, reusing its lists.
+    """
+
+    def __init__(self):
+        """Initialize an empty queue."""
+        self.layers = [[] for layer in LAYERS]
+
+    def __iter__(self):
+        """Iterate over every item, back to front."""
+        for layer in self.layers:
+            yield from layer
+
+    def __len__(self):
+        """Return the number of items queued."""
+        return sum(len(layer) for layer in self.layers)
+
+    def add(self, layer, image, rect):
+        """Queue one item on a layer."""
+        self.layers[layer].append((image, rect))
+
+    def extend(self, layer, items):
+        """Queue (image, rect) pairs on a layer."""
+        self.layers[layer].extend(items)
+
+    def clear(self):
+        """Empty every layer."""
+        for layer in self.layers:
+            layer.clear()
+
+    def submit(self, screen):
+        """Draw every layer, back to front."""
+        for layer in self.layers:
+            if layer:
+                blit_all(screen, layer)
+
+
+class FullRenderer:
+    """Redraw the whole screen every frame."""
+
+    def __init__(self, bg_color, display=None):
+        """Initialize with the background color and the Display, if any."""
+        self.bg_color = bg_color
+        self.display = display
+
+    def draw(self, screen, queue):
+        """Draw a RenderQueue."""
+        screen.fill(self.bg_color)
+        queue.submit(screen)
+
+    def present(self):
+        """Show the finished frame."""
+        if self.display:
+            self.display.present()
+        else:
+            pygame.display.flip()
+
+    def invalidate(self):
+        """Nothing is kept between frames, so there's nothing to forget."""
+
+
+class DirtyRenderer:
+    """Redraw only the parts of the screen that changed since last frame.
+
+    An item is an (image, rect) pair. Items that appeared, vanished, moved
+    or changed image mark their old and new rects as dirty. Those areas
+    are cleared to the background, every item touching them is drawn
+    again, and only they are pushed to the display by present().
+    """
+
+    # Past this many dirty rects, they're merged into one bounding rect.
+    max_dirty_rects = 64
+
+    def __init__(self, bg_color, display=None):
+        """Initialize with the background color and the Display, if any."""
+        self.bg_color = bg_color
+        self.display = display
+        self.previous = None
+        # The areas to push to the display; None means all of it.
+        self.dirty = []
+
+    def draw(self, screen, queue):
+        """Draw a RenderQueue, where things changed."""
+        current = {(image, tuple(rect)) for image, rect in queue}
+        if self.previous is None:
+            self._draw_all(screen, queue)
+        else:
+            changed = current.symmetric_difference(self.previous)
+            if changed:
+                dirty = [pygame.Rect(rect) for image, rect in changed]
+                self._draw_dirty(screen, list(queue), dirty)
+            else:
+                self.dirty = []
+        # Keeping the old images alive means their ids can't be reused.
+        self.previous = current
+
+    def present(self):
+        """Push the changed areas to the display."""
+        if self.display:
+            self.display.present(self.dirty)
+        elif self.dirty is None:
+            pygame.display.flip()
+        elif self.dirty:
+            pygame.display.update(self.dirty)
+
+    def invalidate(self):
+        """Redraw the whole screen next frame, e.g. after a mode change."""
+        self.previous = None
+
+    def _draw_all(self, screen, queue):
+        """Draw everything, to be shown as a whole."""
+        screen.fill(self.bg_color)
+        queue.submit(screen)
+        self.dirty = None
+
+    def _draw_dirty(self, screen, items, dirty):
+        """Redraw the items touching the dirty rects."""
+        dirty = self._merge(dirty)
+        # An item drawn again must be drawn whole, so its rect becomes dirty
+        # too; repeat until no more items are pulled in.
+        redraw = [False] * len(items)
+        grew = True
+        while grew:
+            grew = False
+            for index, (image, rect) in enumerate(items):
+                if not redraw[index] and rect.collidelist(dirty) != -1:
+                    redraw[index] = True
+                    dirty.append(pygame.Rect(rect))
+                    grew = True
+            dirty = self._merge(dirty)
+
+        for rect in dirty:
+            screen.fill(self.bg_color, rect)
+        blit_all(screen, [item for item, again in zip(items, redraw)
+                          if again])
+        self.dirty = dirty
+
+    def _merge(self, dirty):
+        """Collapse too many dirty rects into their bounding rect."""
+        if len(dirty) > self.max_dirty_rects:
+            return [dirty[0].unionall(dirty[1:])]
+        return dirty
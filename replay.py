@@ -0,0 +1,181 @@
+"""Record the game's input and replay it headless as fast as possible.
+
+A recording holds the seed, a snapshot of the settings and one byte of
+input per tick, run-length encoded, along with the final score, level and
+state hash. Replaying runs the same ticks through a fresh GameSim and
+checks that it ends up in exactly the same state:
+
+    python replay.py session.abr
+"""
+import argparse
+import json
+import struct
+import sys
+from time import perf_counter
+
+from settings import Settings
+from game_sim import GameSim, Inputs
+
+MAGIC = b"ABRP"
+VERSION = 1
+
+# Bits of a tick's input byte.
+UP = 0x01
+DOWN = 0x02
+FIRE_SHIFT = 2      # two bits: 0-3 shots
+PAUSE = 0x10
+START_SHIFT = 5     # three bits: 0 for none, else difficulty index + 1
+
+# A run of identical input bytes: the byte and how many ticks it lasted.
+RUN = struct.Struct("<BH")
+
+
+def encode_inputs(inputs, difficulties):
+    """Pack one tick's input into a byte."""
+    code = 0
+    if inputs.moving_up:
+        code |= UP
+    if inputs.moving_down:
+        code |= DOWN
+    code |= min(inputs.fire, 3) << FIRE_SHIFT
+    if inputs.pause:
+        code |= PAUSE
+    if inputs.start is not None:
+        code |= (difficulties.index(inputs.start) + 1) << START_SHIFT
+    return code
+
+
+def decode_inputs(code, difficulties, inputs):
+    """Unpack a byte into the given Inputs."""
+    inputs.moving_up = bool(code & UP)
+    inputs.moving_down = bool(code & DOWN)
+    inputs.fire = (code >> FIRE_SHIFT) & 0x03
+    inputs.pause = bool(code & PAUSE)
+    start = code >> START_SHIFT
+    inputs.start = difficulties[start - 1] if start else None
+    return inputs
+
+
+def settings_snapshot(settings):
+    """Return the settings as plain JSON-friendly values."""
+    return json.loads(json.dumps(vars(settings)))
+
+
+def settings_from_snapshot(snapshot):
+    """Rebuild Settings from a snapshot."""
+    settings = Settings()
+    for name, value in snapshot.items():
+        if isinstance(getattr(settings, name, None), tuple):
+            value = tuple(value)
+        setattr(settings, name, value)
+    return settings
+
+
+class InputRecorder:
+    """Collect the input fed to a simulation, tick by tick."""
+
+    def __init__(self, sim):
+        """Start recording a simulation from its current state."""
+        self.seed = sim.seed
+        self.settings = settings_snapshot(sim.settings)
+        self.difficulties = list(sim.settings.difficulty_speedups)
+        self.codes = bytearray()
+
+    def record(self, inputs):
+        """Record the input for the next tick; call it before step()."""
+        self.codes.append(encode_inputs(inputs, self.difficulties))
+
+    def save(self, path, sim):
+        """Write the recording along with the simulation's final state."""
+        header = json.dumps({
+            "seed": self.seed,
+            "settings": self.settings,
+            "ticks": len(self.codes),
+            "score": sim.stats.score,
+            "level": sim.stats.level,
+            "state_hash": sim.state_hash(),
+        }).encode()
+
+        runs = bytearray()
+        codes = self.codes
+        start = 0
+        while start < len(codes):
+            end = start + 1
+            while (end < len(codes) and codes[end] == codes[start] and
+                   end - start < 0xFFFF):
+                end += 1
+            runs += RUN.pack(codes[start], end - start)
+            start = end
+
+        with open(path, "wb") as file:
+            file.write(MAGIC + struct.pack("<BI", VERSION, len(header)))
+            file.write(header)
+            file.write(runs)
+
+
+def load(path):
+    """Return (header, input bytes) from a recording."""
+    with open(path, "rb") as file:
+        data = file.read()
+    if data[:4] != MAGIC:
+        raise ValueError(f"{path} is not a recording")
+    version, header_size = struct.unpack_from("<BI", data, 4)
+    if version != VERSION:
+        raise ValueError(f"{path} is version {version}, expected {VERSION}")
+    start = 4 + struct.calcsize("<BI")
+    header = json.loads(data[start:start + header_size])
+
+    codes = bytearray()
+    for code, count in RUN.iter_unpack(data[start + header_size:]):
+        codes += bytes((code,)) * count
+    return header, codes
+
+
+def replay(path):
+    """Re-run a recording headless; return (matches, details)."""
+    header, codes = load(path)
+    settings = settings_from_snapshot(header["settings"])
+    sim = GameSim(settings, seed=header["seed"])
+    difficulties = list(settings.difficulty_speedups)
+
+    inputs = Inputs()
+    start = perf_counter()
+    for code in codes:
+        sim.step(decode_inputs(code, difficulties, inputs))
+        sim.events.clear()
+    elapsed = perf_counter() - start
+
+    details = {
+        "ticks": len(codes),
+        "ticks_per_second": round(len(codes) / elapsed) if elapsed else None,
+        "score": (sim.stats.score, header["score"]),
+        "level": (sim.stats.level, header["level"]),
+        "state_hash": (sim.state_hash(), header["state_hash"]),
+    }
+    matches = all(details[key][0] == details[key][1]
+                  for key in ("score", "level", "state_hash"))
+    return matches, details
+
+
+def main(argv=None):
+    """Replay each recording given on the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="+", metavar="RECORDING",
+                        help="a recording made with Settings.record_path")
+    args = parser.parse_args(argv)
+    failed = 0
+    for path in args.paths:
+        matches, details = replay(path)
+        print(f"{path}: {'OK' if matches else 'MISMATCH'} "
+              f"{details['ticks']} ticks at {details['ticks_per_second']}/s")
+        if not matches:
+            failed += 1
+            for key in ("score", "level", "state_hash"):
+                got, expected = details[key]
+                if got != expected:
+                    print(f"  {key}: got {got}, recorded {expected}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,7 +1,8 @@
+import pygame
 import pygame.font
-from pygame.sprite import Group
 
-from plane import Plane
+from assets import assets
+from hud_text import get_font, GlyphAtlas
 
 class Scoreboard:
     """A class to report scoring information."""
@@ -16,7 +17,17 @@ class Scoreboard:
 
         # Font settings for scoring information.
         self.text_color = (30, 30, 30)
-        self.font = pygame.font.SysFont(None, 48)
+        self.font = get_font(48)
+
+        # The digits are rendered once; a new score is pieced together from
+        # them. The scores read from top to bottom.
+        self.score_glyphs = GlyphAtlas(self.font, self.text_color, angle=-90)
+        self.high_score_glyphs = GlyphAtlas(self.font, self.text_color,
+                                            self.setttings.bg_color, angle=-90)
+        self.level_glyphs = GlyphAtlas(self.font, self.text_color)
+
+        # One image holding the lives icons, for each number of planes left.
+        self.planes_images = {}
 
         self._prep_images()
     
@@ -32,8 +43,7 @@ class Scoreboard:
         """Turn the score into a rendered image."""
         rounded_score = round(self.stats.score)
         score_str = f"{rounded_score:,}"
-        self.score_image = self.font.render(score_str, True, self.text_color)
-        self.score_image = pygame.transform.rotate(self.score_image, -90)
+        self.score_image = self.score_glyphs.render(score_str)
 
         # Display the score at the left bottom of the screen.
         self.score_rect = self.score_image.get_rect()
@@ -44,9 +54,7 @@ class Scoreboard:
         """Turn the high score into a rendered image."""
         high_score = round(self.stats.high_score)
         high_score_str = f"{high_score:,}"
-        self.high_score_image = self.font.render(high_score_str, True, 
-                                    self.text_color, self.setttings.bg_color)
-        self.high_score_image = pygame.transform.rotate(self.high_score_image, -90)
+        self.high_score_image = self.high_score_glyphs.render(high_score_str)
         
         # Center the high score on the right side of the screen.
         self.high_score_rect = self.high_score_image.get_rect()
@@ -54,41 +62,45 @@ class Scoreboard:
         self.high_score_rect.x -= 10
         self.high_score_rect.y -= 20
 
-    def check_high_score(self):
-        """Check to see if there's a new high score."""
-        if self.stats.score > self.stats.high_score:
-            self.stats.high_score = self.stats.score
-            self.prep_high_score()
-
     def prep_level(self):
         """Turn the level into a rendered image."""
         level_str = str(self.stats.level)
-        self.level_image = self.font.render(level_str, True, self.text_color)
+        self.level_image = self.level_glyphs.render(level_str)
         
         # Position the level below the score.
         self.level_rect = self.level_image.get_rect()
         self.level_rect.right = self.screen_rect.right - 10
         self.level_rect.top = 10 + (76 / 2) * 3 # 76 is the height of plane.
 
-    def show_score(self):
-        """Draw scores, level, and planes vertically on the right side."""
-        self.screen.blit(self.score_image, self.score_rect)
-        self.screen.blit(self.high_score_image, self.high_score_rect)
-        self.screen.blit(self.level_image, self.level_rect)
-        self.planes.draw(self.screen)
-    
+    def hud_items(self):
+        """Return the (image, rect) pairs that make up the scoreboard."""
+        items = [(self.score_image, self.score_rect),
+                 (self.high_score_image, self.high_score_rect),
+                 (self.level_image, self.level_rect)]
+        if self.stats.plane_left:
+            items.append((self.planes_image, self.planes_rect))
+        return items
+
+    def refresh_images(self):
+        """Build the plane icons again from the newly converted image."""
+        self.planes_images.clear()
+        self.prep_planes()
+
     def prep_planes(self):
         """Show how many planes are left."""
-        self.planes = Group()
-        for plane_number in range(self.stats.plane_left):
-            plane = Plane(self.hg_game)
-            
-            # Resize the plane's image by half
-            plane.image = pygame.transform.scale(plane.image, 
-            (plane.rect.width // 2, plane.rect.height // 2))
-            plane.rect = plane.image.get_rect()
-            
-            # Position the plane
-            plane.rect.x = self.screen_rect.right - plane.rect.width - 10
-            plane.rect.y = 10 + plane_number * plane.rect.height
-            self.planes.add(plane)
\ No newline at end of file
+        self.planes_image = self.planes_images.get(self.stats.plane_left)
+        if self.planes_image is None:
+            # Stack the half-size plane images top to bottom.
+            icon = assets.image("plane", 0.5)
+            width, height = icon.get_size()
+            self.planes_image = pygame.Surface(
+                (width, height * self.stats.plane_left), pygame.SRCALPHA)
+            for plane_number in range(self.stats.plane_left):
+                self.planes_image.blit(icon, (0, plane_number * height),
+                                       special_flags=pygame.BLEND_RGBA_MAX)
+            self.planes_images[self.stats.plane_left] = self.planes_image
+
+        # Position the planes
+        self.planes_rect = self.planes_image.get_rect()
+        self.planes_rect.x = self.screen_rect.right - self.planes_rect.width - 10
+        self.planes_rect.y = 10
@@ -3,11 +3,38 @@ class Settings:
 
     def __init__(self):
         """Initialize the static settings"""
-        # Screen settings
+        # Screen settings. The playfield is always this size; the window
+        # or monitor only changes how large it's shown.
         self.screen_width = 1280
         self.screen_height = 720
+        # Frames are drawn at the playfield size times this, then scaled
+        # to fit the window. Below 1 draws fewer pixels on slow machines.
+        self.render_scale = 1.0
         self.bg_color = (135, 206, 235)
         self.fullscreen = False
+        # Only redraw what changed each frame instead of the whole screen.
+        self.dirty_rects = False
+        # Time each phase of every frame; F3 shows the numbers. The frames
+        # are saved to profile_output (.csv or .json) on exit.
+        self.profile = False
+        self.profile_output = "profile.csv"
+        # The profiler also times garbage collections, and traces the
+        # allocations of one frame in this many.
+        self.alloc_sample_every = 120
+        # How the garbage collector is kept from pausing play: "frozen",
+        # "tuned" or "default"; see memory.py. It collects when idle.
+        self.gc_mode = "frozen"
+        self.gc_young_limit = 10000
+        # Record every tick's input to this file, for replay.py.
+        self.record_path = None
+        # Every finished run is appended to this journal.
+        self.score_journal = "scores.journal"
+        # Sound effects and music; off with --no-audio.
+        self.audio = True
+        # Mixer channels for each category of sound effect, and how close
+        # together repeats of an effect are heard as one, in milliseconds.
+        self.sound_channels = {"weapons": 2, "explosions": 4}
+        self.sound_coalesce_ms = 40
 
         # Bullet settings:
         self.bullet_height = 15
@@ -15,21 +42,48 @@ class Settings:
         self.bullet_color = (255, 64, 0)
         self.bullet_allowed = 3
 
+        # Simulation ticks per second, and how long to pause after the plane
+        # is hit or a level is cleared, in seconds.
+        self.tick_rate = 60
+        self.sequence_pause = 2.5
+        # Frames drawn per second at most; 0 leaves it to the display. A
+        # slow frame is caught up on with up to max_catch_up ticks before
+        # the next one is drawn; past that, the game slows down.
+        self.frame_rate = 60
+        self.max_catch_up = 5
+
+        # "rect" counts any overlap of two sprites' rects as a hit; "mask"
+        # only an overlap of their solid pixels.
+        self.collision_mode = "rect"
+
+        # Fleet settings: aliens are placed this many alien sizes apart.
+        self.fleet_spacing = 2
+        # The formations and levels, and the most aliens let in at once.
+        self.formations_file = "formations.json"
+        self.max_live_aliens = 256
+
         # Plane settings
         self.plane_limit = 3
 
         # How quickly the game speeds up and alien point values increase
         self.speedup_scale = 1.1
         self.score_scale = 1.1
+        # How many times each difficulty speeds the game up at the start.
+        self.difficulty_speedups = {
+            "EASY": 0, "NORMAL": 8, "HARD": 18, "HELL": 24}
 
         self.initialize_dynamic_settings()
     
     def initialize_dynamic_settings(self):
         """Initialize settings that changes"""
-        self.bullet_speed = 2.0
-        self.alien_speed = 0.75
+        # Speeds are in pixels per tick at 60 ticks per second, scaled to
+        # the tick rate so the game plays equally fast at any rate.
+        tick_scale = 60 / self.tick_rate
+        self.bullet_speed = 2.0 * tick_scale
+        self.alien_speed = 0.75 * tick_scale
+        # How far the fleet moves forward at each edge, in pixels.
         self.fleet_forward_speed = 15
-        self.plane_speed = 1.2
+        self.plane_speed = 1.2 * tick_scale
         # fleet_direction of 1 represents down; -1 represents up.
         self.fleet_direction = -1
         # Score settings
@@ -0,0 +1,257 @@
+"""Play the game headless for a long time and check nothing builds up.
+
+The autopilot plays through levels and loses plane after plane, game
+after game, through the whole front end: simulation, scoreboard, silent
+sound effects, garbage collection control and drawing. Every so many
+frames the process's resident memory and the number of live objects of
+each entity type are sampled, along with the 99th percentile frame time
+since the sample before. Frame times are also gathered a round at a
+time, one game at each difficulty, as the difficulties play at different
+paces.
+
+After a warm-up, in which pools and caches grow to their working size,
+the run fails if resident memory grows by more than --max-growth-mb, or
+if any entity count grows by more than --max-object-growth. It also
+fails if the p99 frame time of the last quarter of the rounds drifts to
+more than --max-drift times that of the first quarter, and by more than
+--min-drift-ms; smaller changes are noise on a sub-millisecond frame. A
+run of fewer than three whole rounds can't be checked for drift:
+
+    python soak.py --levels 2000 --deaths 2000
+
+The playfield is smaller and the tick rate lower than the game's own, so
+levels and deaths come round faster; see --size and --tick-rate.
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+from time import perf_counter
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import numpy as np
+
+from settings import Settings
+from game_sim import PLAYING, DYING, LEVEL_CLEAR
+from autopilot import SoakPolicy
+from memory import ENTITY_TYPES, MemoryMonitor
+
+
+def rss_mb():
+    """Return the resident memory of this process in megabytes."""
+    try:
+        with open("/proc/self/statm") as file:
+            pages = int(file.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, IndexError):
+        # No /proc; the peak is the best there is.
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (2 ** 20 if sys.platform == "darwin" else 2 ** 10)
+
+
+def make_game(size, tick_rate, sequence_pause, journal):
+    """Return a loaded Horizongame for the autopilot to play."""
+    from alien_blaster import Horizongame
+    settings = Settings()
+    settings.screen_width, settings.screen_height = size
+    settings.tick_rate = tick_rate
+    settings.initialize_dynamic_settings()
+    settings.sequence_pause = sequence_pause
+    settings.audio = False
+    settings.record_path = None
+    settings.score_journal = journal
+    hg = Horizongame(settings)
+    hg.load()
+    # The score table holds up to `keep` runs; a short one fills up during
+    # the warm-up rather than looking like growth for the first 100 games.
+    hg.high_scores.keep = 3
+    return hg
+
+
+def sample(monitor, frame_times, totals, taken=0):
+    """Return one sample of memory, object counts and frame times.
+
+    taken is how many samples are being kept, so they aren't counted.
+    """
+    # Frozen objects are invisible to the collector, so everything is let
+    # out for the count, and only what's still reachable is counted.
+    frozen = gc.get_freeze_count()
+    gc.unfreeze()
+    gc.collect()
+    counts = monitor.count_objects()
+    objects = len(gc.get_objects()) - taken
+    if frozen:
+        gc.freeze()
+    return {
+        **totals,
+        "rss_mb": round(rss_mb(), 2),
+        "objects": objects,
+        "entities": dict(counts),
+        **frame_time_summary(frame_times),
+    }
+
+
+def frame_time_summary(frame_times):
+    """Return the median and 99th percentile of some frame times, in ms."""
+    times = np.array(frame_times) * 1000
+    return {"p50_ms": round(float(np.percentile(times, 50)), 4),
+            "p99_ms": round(float(np.percentile(times, 99)), 4)}
+
+
+def check(samples, rounds, warmup, max_growth_mb, max_object_growth,
+          max_drift, min_drift_ms):
+    """Return a list of what went wrong after the warm-up, if anything."""
+    failures = []
+    if len(samples) < warmup + 2:
+        return [f"only {len(samples)} samples; need more than {warmup + 1}"]
+    baseline, last = samples[warmup], samples[-1]
+
+    growth = last["rss_mb"] - baseline["rss_mb"]
+    if growth > max_growth_mb:
+        failures.append(f"resident memory grew {growth:.1f} MB")
+    grown = last["objects"] - baseline["objects"]
+    if grown > max_object_growth:
+        failures.append(f"{grown} more live objects")
+    for name in ENTITY_TYPES:
+        grown = last["entities"][name] - baseline["entities"][name]
+        if grown > max_object_growth:
+            failures.append(f"{grown} more {name} objects")
+
+    # Whole rounds, so both quarters play every difficulty alike, and
+    # medians of them, so one busy moment on the machine doesn't count.
+    # The first round warms up.
+    p99s = [each["p99_ms"] for each in rounds[1:]]
+    if len(p99s) >= 2:
+        quarter = max(1, len(p99s) // 4)
+        early = np.median(p99s[:quarter])
+        late = np.median(p99s[-quarter:])
+        if late > early * max_drift and late - early > min_drift_ms:
+            failures.append(f"p99 frame time drifted from {early:.3f} ms "
+                            f"to {late:.3f} ms")
+    return failures
+
+
+def soak(levels, deaths, size=(960, 540), tick_rate=15, sequence_pause=0.5,
+         levels_per_game=3, sample_every=5000, max_minutes=None,
+         progress=None):
+    """Play until there have been enough levels and deaths.
+
+    Returns the samples, and the frame times of each round of games.
+    """
+    # A journal of its own, so the soak's games stay off the real one.
+    journal_dir = tempfile.TemporaryDirectory()
+    hg = make_game(size, tick_rate, sequence_pause,
+                   os.path.join(journal_dir.name, "scores.journal"))
+    policy = SoakPolicy(levels_per_game=levels_per_game)
+    monitor = MemoryMonitor()
+    totals = {"frames": 0, "games": 0, "levels": 0, "deaths": 0}
+    samples = []
+    frame_times = []
+    rounds = []
+    round_times = []
+    state = hg.sim.state
+    started = perf_counter()
+    while totals["levels"] < levels or totals["deaths"] < deaths:
+        games = policy.games
+        policy.act(hg.sim, hg.inputs)
+        if (policy.games != games and
+                games and games % len(policy.difficulties) == 0):
+            # A new round starts with this game.
+            rounds.append({"games": games, "frames": len(round_times),
+                           **frame_time_summary(round_times)})
+            round_times.clear()
+        start = perf_counter()
+        hg._play_frame(1)
+        frame_time = perf_counter() - start
+        frame_times.append(frame_time)
+        round_times.append(frame_time)
+        totals["frames"] += 1
+
+        # Count levels cleared and planes lost as the game moves on.
+        if hg.sim.state != state:
+            if state == PLAYING and hg.sim.state == LEVEL_CLEAR:
+                totals["levels"] += 1
+            elif state == PLAYING and hg.sim.state == DYING:
+                totals["deaths"] += 1
+            state = hg.sim.state
+
+        if totals["frames"] % sample_every == 0:
+            totals["games"] = policy.games
+            samples.append(sample(monitor, frame_times, totals,
+                                  len(samples)))
+            frame_times.clear()
+            if progress:
+                progress(samples[-1])
+            if (max_minutes is not None and
+                    perf_counter() - started > max_minutes * 60):
+                break
+    # A last few frames make too small a window for a p99 of their own.
+    if len(frame_times) >= sample_every // 2 or not samples:
+        totals["games"] = policy.games
+        samples.append(sample(monitor, frame_times, totals, len(samples)))
+    monitor.close()
+    hg.gc_control.close()
+    hg.high_scores.close()
+    journal_dir.cleanup()
+    return samples, rounds
+
+
+def main(argv=None):
+    """Run the soak and print the samples and verdict as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--levels", type=int, default=2000,
+                        help="play until this many levels have been cleared")
+    parser.add_argument("--deaths", type=int, default=2000,
+                        help="and this many planes have been lost")
+    parser.add_argument("--size", default="960x540",
+                        help="playfield size, WIDTHxHEIGHT")
+    parser.add_argument("--tick-rate", type=int, default=15)
+    parser.add_argument("--levels-per-game", type=int, default=3)
+    parser.add_argument("--sample-every", type=int, default=5000,
+                        help="frames between samples")
+    parser.add_argument("--warmup", type=int, default=3,
+                        help="samples before the baseline")
+    parser.add_argument("--max-minutes", type=float,
+                        help="stop early after this long")
+    parser.add_argument("--max-growth-mb", type=float, default=8.0)
+    parser.add_argument("--max-object-growth", type=int, default=64)
+    parser.add_argument("--max-drift", type=float, default=1.5)
+    parser.add_argument("--min-drift-ms", type=float, default=0.5)
+    parser.add_argument("-o", "--output", help="write the JSON here")
+    args = parser.parse_args(argv)
+
+    width, height = (int(value) for value in args.size.split("x"))
+
+    def progress(latest):
+        """Show how far the soak has got."""
+        print(f"\r{latest['frames']} frames, {latest['levels']} levels, "
+              f"{latest['deaths']} deaths, {latest['rss_mb']:.1f} MB, "
+              f"p99 {latest['p99_ms']:.3f} ms", end="", file=sys.stderr)
+
+    samples, rounds = soak(args.levels, args.deaths, (width, height),
+                           args.tick_rate,
+                           levels_per_game=args.levels_per_game,
+                           sample_every=args.sample_every,
+                           max_minutes=args.max_minutes, progress=progress)
+    print(file=sys.stderr)
+    failures = check(samples, rounds, args.warmup, args.max_growth_mb,
+                     args.max_object_growth, args.max_drift,
+                     args.min_drift_ms)
+    report = {"passed": not failures, "failures": failures,
+              "samples": samples, "rounds": rounds}
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text)
+    else:
+        print(text)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
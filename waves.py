@@ -0,0 +1,216 @@
+"""Levels as streams of alien waves, read from a formations file.
+
+A formation is a few rows of text, "X" for an alien and "." for a gap,
+repeated down the playfield as far as it goes. A level lists which
+formations come in and how many of each; "fill" means as many as fit
+across the playfield at once. Levels past the last one in the file play
+the last one again, with extra_waves more waves for each level beyond.
+
+Each formation is worked out in pixels once per playfield size. During a
+level the waves are taken from a generator one at a time, as the fleet
+moves forward and frees up room at the right, and never beyond the
+settings' max_live_aliens, so however long a level is the fleet stays the
+same size. A formation with more aliens than that comes in once the fleet
+is empty.
+"""
+import json
+from functools import lru_cache
+from itertools import islice
+
+import numpy as np
+
+
+class Formation:
+    """A formation laid out for one playfield size."""
+
+    def __init__(self, x, y, columns, width, fill):
+        """Initialize with the aliens' offsets and the formation's size."""
+        # From the formation's left edge, and from the top of the playfield.
+        self.x = x
+        self.y = y
+        self.columns = columns
+        # How far the next formation starts to the right of this one.
+        self.width = width
+        # How many copies fit across the playfield.
+        self.fill = fill
+
+    def __len__(self):
+        """Return the number of aliens."""
+        return len(self.x)
+
+
+class Formations:
+    """The formations and levels of a formations file."""
+
+    def __init__(self, path):
+        """Read the file and check that the levels name real formations."""
+        with open(path) as file:
+            data = json.load(file)
+        self.patterns = data["formations"]
+        self.levels = data["levels"]
+        self.extra_waves = data.get("extra_waves", 0)
+        for level in self.levels:
+            for name, count in level:
+                if name not in self.patterns:
+                    raise ValueError(f"{path}: no formation named {name!r}")
+        # Laid out formations, by playfield and alien size.
+        self._compiled = {}
+
+    def compile(self, screen_size, alien_size, spacing):
+        """Return every formation laid out for a playfield, by name."""
+        key = (screen_size, alien_size, spacing)
+        compiled = self._compiled.get(key)
+        if compiled is None:
+            compiled = {name: self._lay_out(rows, screen_size, alien_size,
+                                            spacing)
+                        for name, rows in self.patterns.items()}
+            self._compiled[key] = compiled
+        return compiled
+
+    def waves(self, level, compiled):
+        """Yield the name of each formation of a level, in order."""
+        entries = self.levels[min(level, len(self.levels)) - 1]
+        for name, count in entries:
+            if count == "fill":
+                count = compiled[name].fill
+            for number in range(count):
+                yield name
+        # Past the last level, more of its streamed formations.
+        streamed = [name for name, count in entries if count != "fill"]
+        streamed = streamed or [entries[-1][0]]
+        extra = self.extra_waves * max(0, level - len(self.levels))
+        for number in range(extra):
+            yield streamed[number % len(streamed)]
+
+    def _lay_out(self, rows, screen_size, alien_size, spacing):
+        """Lay out one formation, repeating its rows down the playfield."""
+        screen_width, screen_height = screen_size
+        alien_width, alien_height = alien_size
+        step_x, step_y = spacing * alien_width, spacing * alien_height
+
+        # Rows go from one alien height down to two above the bottom.
+        tops = []
+        current_y = alien_height
+        while current_y < screen_height - 2 * alien_height:
+            tops.append(current_y)
+            current_y += spacing * alien_height
+        xs, ys = [], []
+        for number, top in enumerate(tops):
+            row = rows[number % len(rows)]
+            for column, cell in enumerate(row):
+                if cell != ".":
+                    xs.append(column * step_x)
+                    ys.append(top)
+        columns = max(len(row) for row in rows)
+        width = columns * step_x
+
+        # Columns go from five alien widths in to two from the right edge.
+        fill = 0
+        left = first_column(alien_width)
+        while left + (columns - 1) * step_x < last_column(screen_width,
+                                                          alien_width):
+            fill += 1
+            left += width
+        return Formation(np.array(xs), np.array(ys), columns, width, fill)
+
+
+def first_column(alien_width):
+    """Return the leftmost x a wave comes in at."""
+    return alien_width * 5
+
+
+def last_column(screen_width, alien_width):
+    """Return the x a wave's columns must come in to the left of."""
+    return screen_width - alien_width * 2
+
+
+@lru_cache(maxsize=None)
+def load_formations(path):
+    """Return the formations of a file, read once per process."""
+    return Formations(path)
+
+
+class WaveStream:
+    """Feeds a level's waves into the fleet as there's room for them."""
+
+    def __init__(self, hg_game):
+        """Initialize for a game; start() begins a level."""
+        self.hg_game = hg_game
+        self.settings = hg_game.settings
+        self.fleet = hg_game.fleet
+        self.formations = load_formations(self.settings.formations_file)
+        self.level = 0
+        # Waves let in so far this level.
+        self.spawned = 0
+        # The formation waiting to come in, or None at the end of a level.
+        self.pending = None
+        # Where the next wave starts, in the fleet's own coordinates.
+        self.cursor = 0.0
+        self._compiled = None
+        self._waves = iter(())
+
+    @property
+    def exhausted(self):
+        """Whether every wave of the level has come in."""
+        return self.pending is None
+
+    def start(self, level):
+        """Begin streaming a level's waves; the fleet should be empty."""
+        screen = self.hg_game.screen
+        fleet = self.fleet
+        self._compiled = self.formations.compile(
+            screen.get_size(), (fleet.width, fleet.height),
+            self.settings.fleet_spacing)
+        self.level = level
+        self.spawned = 0
+        self._waves = self.formations.waves(level, self._compiled)
+        self.pending = next(self._waves, None)
+        self.cursor = float(first_column(fleet.width))
+
+    def seek(self, level, spawned, cursor):
+        """Pick a level's stream up again after `spawned` of its waves."""
+        if (level, spawned) != (self.level, self.spawned):
+            # Which wave comes next only depends on how many came before.
+            self.start(level)
+            self._waves = islice(self.formations.waves(level, self._compiled),
+                                 spawned, None)
+            self.spawned = spawned
+            self.pending = next(self._waves, None)
+        self.cursor = cursor
+
+    def update(self):
+        """Let in as many waiting waves as there's room for."""
+        fleet = self.fleet
+        screen_width, screen_height = self.hg_game.screen.get_size()
+        limit = last_column(screen_width, fleet.width)
+        while self.pending is not None:
+            formation = self._compiled[self.pending]
+            # A formation bigger than the limit still comes in, on its own,
+            # or the level would wait for it forever.
+            if fleet and len(fleet) + len(formation) > \
+                    self.settings.max_live_aliens:
+                break
+            # The cursor moves forward with the fleet, but a wave never
+            # comes in closer to the plane than the first column.
+            left = max(self.cursor + fleet.shift_x,
+                       float(first_column(fleet.width)))
+            right = left + (formation.columns - 1) * fleet.width * \
+                self.settings.fleet_spacing
+            if fleet and right >= limit:
+                break
+            if len(formation):
+                self._spawn(formation, left, screen_height)
+            self.cursor = left - fleet.shift_x + formation.width
+            self.spawned += 1
+            self.pending = next(self._waves, None)
+
+    def _spawn(self, formation, left, screen_height):
+        """Add a formation's aliens to the fleet, in step with the rest."""
+        fleet = self.fleet
+        # Up or down as far as the fleet has moved, but on the playfield.
+        shift_y = min(max(fleet.shift_y, 1 - formation.y.min()),
+                      screen_height - 1 - fleet.height - formation.y.max())
+        positions = np.empty((len(formation), 2))
+        positions[:, 0] = np.trunc(left + formation.x)
+        positions[:, 1] = np.trunc(formation.y + shift_y)
+        fleet.spawn(positions)